@@ -0,0 +1,133 @@
+import argparse
+
+import numpy as np
+
+from match import DEFAULT_TIMESTEP
+
+
+class BatchMatch:
+    def __init__(self, count: int, paddle1_system, paddle2_system, width: int = 1024, height: int = 768,
+                 speed: float = 1000.0, max_speed: float = 800.0, ball_speed: float = 800.0,
+                 max_angle_variation: float = 45.0, paddle_size: int = 100, score: int = -1,
+                 ball_reset: int | None = None, seed: int | None = None, control_rate: float | None = None):
+        for system in [paddle1_system, paddle2_system]:
+            if not hasattr(system, 'get_outputs'):
+                raise ValueError('Paddle system ' + str(system) + ' has no batched get_outputs')
+        self.count = count
+        self.paddle_systems = [paddle1_system, paddle2_system]
+        self.width = width
+        self.height = height
+        self.speed = speed
+        self.max_speed = max_speed
+        self.ball_speed = ball_speed
+        self.max_angle_variation = max_angle_variation
+        self.paddle_size = paddle_size
+        self.score_to_win = score
+        self.ball_reset = ball_reset
+        self.control_period = None if control_rate is None else 1.0 / control_rate
+
+        self.rng = np.random.default_rng(seed)
+        self.score = np.zeros((count, 2), dtype=np.int64)
+        self.paddle_x = np.array([10.0, width - 20.0])
+        self.paddle_y = np.full((count, 2), float(height // 2 - 50))
+        self.paddle_velocity = np.zeros((count, 2))
+        self.ball_x = np.full(count, float(width // 2))
+        self.ball_y = np.full(count, float(height // 2))
+        self.ball_speed_current = np.full(count, ball_speed / 2)
+        self.ball_angle = self.rng.integers(0, 361, count).astype(np.float64)
+        self.paddle_speed_outputs = np.zeros((count, 2))
+        self.time = 0.0
+        self.time_since_ball_spawn = np.zeros(count)
+        self.steps = 0
+        self.control_time = 0.0
+        self.finished = np.zeros(count, dtype=bool)
+        self.winner = np.full(count, -1, dtype=np.int64)
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace, count: int, paddle1_system, paddle2_system,
+                  seed: int | None = None) -> 'BatchMatch':
+        return cls(count, paddle1_system, paddle2_system, args.width, args.height, args.speed, args.max_speed,
+                   args.ball_speed, args.max_angle_variation, args.paddle_size, args.score, args.ball_reset, seed,
+                   args.control_rate)
+
+    def reset_balls(self, mask: np.ndarray):
+        count = int(mask.sum())
+        if count == 0:
+            return
+        self.ball_x[mask] = self.width / 2.0
+        self.ball_y[mask] = self.height / 2.0
+        self.ball_speed_current[mask] = self.ball_speed / 2
+        self.ball_angle[mask] = self.rng.integers(0, 361, count)
+        self.time_since_ball_spawn[mask] = 0.0
+
+    def ball_delta_y(self, paddle: int) -> np.ndarray:
+        return self.ball_y - (self.paddle_y[:, paddle] + self.paddle_size / 2)
+
+    def step(self, delta: float) -> bool:
+        # Finished matches are frozen by stepping them with a zero delta
+        active = ~self.finished
+        deltas = np.where(active, delta, 0.0)
+        self.time += delta
+        self.steps += 1
+        self.time_since_ball_spawn += deltas
+        if self.ball_reset is not None:
+            self.reset_balls(self.time_since_ball_spawn >= self.ball_reset)
+
+        control_due = self.control_period is None or self.control_time <= 0.0
+        if self.control_period is not None:
+            if control_due:
+                self.control_time = max(self.control_time + self.control_period, 0.0)
+            self.control_time -= delta
+
+        for paddle, system in enumerate(self.paddle_systems):
+            output = self.paddle_speed_outputs[:, paddle]
+            output[~active] = 0.0
+            if control_due:
+                output[active] = system.get_outputs(self.ball_delta_y(paddle)[active],
+                                                    self.paddle_velocity[active, paddle])
+            velocity = self.paddle_velocity[:, paddle] + output * self.speed * deltas
+            self.paddle_velocity[:, paddle] = np.clip(velocity, -self.max_speed, self.max_speed)
+
+        self.paddle_y += self.paddle_velocity * deltas[:, None]
+        top = self.paddle_y <= 0.0
+        self.paddle_y[top] = 0.0
+        self.paddle_velocity[top] = 0.0
+        bottom = self.paddle_y >= self.height - self.paddle_size
+        self.paddle_y[bottom] = self.height - self.paddle_size
+        self.paddle_velocity[bottom] = 0.0
+
+        angle = np.radians(self.ball_angle)
+        self.ball_x += self.ball_speed_current * deltas * np.cos(angle)
+        self.ball_y += self.ball_speed_current * deltas * np.sin(angle)
+
+        wall = (self.ball_y <= 0.0) | (self.ball_y >= self.height)
+        self.ball_angle[wall] = 360.0 - self.ball_angle[wall]
+        scored = self.ball_x <= 0.0
+        self.score[scored, 1] += 1
+        self.reset_balls(scored)
+        scored = self.ball_x >= self.width
+        self.score[scored, 0] += 1
+        self.reset_balls(scored)
+
+        paddle_x = self.paddle_x
+        for paddle, sign in enumerate([1.0, -1.0]):
+            paddle_y = self.paddle_y[:, paddle]
+            if paddle == 0:
+                hit_x = (paddle_x[0] <= self.ball_x) & (self.ball_x <= paddle_x[0] + 10)
+            else:
+                hit_x = (paddle_x[1] >= self.ball_x) & (self.ball_x >= paddle_x[1] - 10)
+            hit = hit_x & (paddle_y <= self.ball_y) & (self.ball_y <= paddle_y + self.paddle_size)
+            angle_variation = (self.ball_y[hit] - paddle_y[hit]) / (self.paddle_size / 2) - 1
+            self.ball_angle[hit] = 180.0 - self.ball_angle[hit] + sign * angle_variation * self.max_angle_variation
+            self.ball_speed_current[hit] = self.ball_speed
+
+        if self.score_to_win != -1:
+            ended = active & (self.score.max(axis=1) >= self.score_to_win)
+            self.finished |= ended
+            self.winner[ended] = np.where(self.score[ended, 0] > self.score[ended, 1], 0, 1)
+        return not self.finished.all()
+
+    def run(self, timestep: float = DEFAULT_TIMESTEP, max_time: float | None = None) -> np.ndarray:
+        while not self.finished.all() and (max_time is None or self.time < max_time):
+            self.step(timestep)
+        return self.score
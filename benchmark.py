@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import crisp_system
+from fuzzy_system import FuzzySystem
+from match import Match, DEFAULT_TIMESTEP
+from profiler import LatencyHistogram
+from tournament import SYSTEMS, pairings
+
+# Percentiles are reported but bucketed and noisy, regressions are judged on these metrics
+COMPARED = ('mean_ns', 'min_ms', 'max_steps_per_s', 'bytes_per_match')
+
+
+def seeded_inputs(seed: int, count: int, height: int, max_speed: float) -> list[tuple[float, float]]:
+    rng = np.random.default_rng(seed)
+    ball_delta_y = rng.uniform(-height, height, count)
+    paddle_velocity = rng.uniform(-max_speed, max_speed, count)
+    return list(zip(ball_delta_y.tolist(), paddle_velocity.tolist()))
+
+
+def bench_latency(system, inputs: list[tuple[float, float]], warmup: int = 100) -> dict:
+    for ball_delta_y, paddle_velocity in inputs[:warmup]:
+        system.get_output(ball_delta_y, paddle_velocity)
+    histogram = LatencyHistogram()
+    now = time.perf_counter_ns
+    for ball_delta_y, paddle_velocity in inputs:
+        start = now()
+        system.get_output(ball_delta_y, paddle_velocity)
+        histogram.record(now() - start)
+    summary = histogram.summary()
+    return {key: summary[key] for key in ['mean_ns', 'p50_ns', 'p95_ns', 'p99_ns']}
+
+
+def bench_construction(args: argparse.Namespace) -> dict:
+    times = []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        FuzzySystem(args.height, args.paddle_size, args.max_speed, args.ball_speed)
+        times.append(time.perf_counter() - start)
+    return {'mean_ms': sum(times) / len(times) * 1000, 'min_ms': min(times) * 1000}
+
+
+def bench_startup(args: argparse.Namespace) -> dict:
+    # Whole headless process without games: interpreter, imports, argument parsing and fuzzy system setup
+    command = [sys.executable, 'main.py', '--paddle1', 'crisp', '--paddle2', 'fuzzy', '--nogui', '--games', '0']
+    times = []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=os.path.dirname(os.path.abspath(__file__)), check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return {'mean_ms': sum(times) / len(times) * 1000, 'min_ms': min(times) * 1000}
+
+
+def bench_throughput(args: argparse.Namespace, paddle1_system, paddle2_system, warmup: int = 500) -> dict:
+    rates = []
+    # The first pass only warms up caches and is not timed
+    for n in range(args.repeats + 1):
+        match = Match(paddle1_system, paddle2_system, args.width, args.height, args.speed, args.max_speed,
+                      args.ball_speed, args.max_angle_variation, args.paddle_size, seed=args.seed)
+        steps = warmup if n == 0 else args.steps
+        start = time.perf_counter()
+        for _ in range(steps):
+            match.step(DEFAULT_TIMESTEP)
+        elapsed = time.perf_counter() - start
+        if n > 0:
+            rates.append(steps / elapsed)
+    return {'mean_steps_per_s': sum(rates) / len(rates), 'max_steps_per_s': max(rates)}
+
+
+def bench_memory(args: argparse.Namespace, paddle1_system, paddle2_system) -> dict:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    matches = [Match(paddle1_system, paddle2_system, args.width, args.height, args.speed, args.max_speed,
+                     args.ball_speed, args.max_angle_variation, args.paddle_size, seed=args.seed + n)
+               for n in range(args.matches)]
+    for match in matches:
+        for _ in range(args.memory_steps):
+            match.step(DEFAULT_TIMESTEP)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return {'bytes_per_match': allocated / len(matches)}
+
+
+def run_benchmarks(args: argparse.Namespace, log) -> dict:
+    fuzzy_system = FuzzySystem(args.height, args.paddle_size, args.max_speed, args.ball_speed)
+    systems = {'crisp': crisp_system, 'fuzzy': fuzzy_system}
+    inputs = seeded_inputs(args.seed, args.samples, args.height, args.max_speed)
+
+    metrics = {}
+
+    def add(prefix: str, values: dict):
+        for key, value in values.items():
+            metrics[prefix + '/' + key] = value
+            log(prefix + '/' + key + ': ' + '{:.4g}'.format(value))
+
+    for name in SYSTEMS:
+        add('get_output/' + name, bench_latency(systems[name], inputs))
+    add('construction/fuzzy', bench_construction(args))
+    add('startup/nogui', bench_startup(args))
+    for paddle1, paddle2 in pairings(SYSTEMS) + [(name, name) for name in SYSTEMS]:
+        key = paddle1 + ' vs ' + paddle2
+        add('throughput/' + key, bench_throughput(args, systems[paddle1], systems[paddle2]))
+        add('memory/' + key, bench_memory(args, systems[paddle1], systems[paddle2]))
+
+    return {'environment': {'python': platform.python_version(), 'numpy': np.__version__,
+                            'platform': platform.platform(), 'machine': platform.machine()},
+            'config': vars(args), 'metrics': metrics}
+
+
+def compare(metrics: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for key, value in metrics.items():
+        if not key.endswith(COMPARED) or key not in baseline or baseline[key] == 0:
+            continue
+        # Throughput is better when higher, everything else (latency, time, memory) when lower
+        change = value / baseline[key] - 1
+        if key.endswith('_per_s'):
+            change = -change
+        if change > tolerance:
+            regressions.append(key + ': ' + '{:.4g}'.format(baseline[key]) + ' -> ' + '{:.4g}'.format(value)
+                               + ' (' + '{:+.0f}'.format(change * 100) + '% worse)')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output', type=str, default=None, help='Benchmark results JSON file')
+    parser.add_argument('--baseline', type=str, default=None,
+                        help='Results JSON file to compare against, exits with status 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Relative slowdown or growth over the baseline reported as a regression')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for controller inputs and match serves')
+    parser.add_argument('--samples', type=int, default=2000, help='get_output calls per paddle system')
+    parser.add_argument('--repeats', type=int, default=10, help='Fuzzy system constructions, process startups and throughput passes')
+    parser.add_argument('--steps', type=int, default=5000, help='Simulation steps per pairing')
+    parser.add_argument('--matches', type=int, default=20, help='Matches kept alive for the memory benchmark')
+    parser.add_argument('--memory_steps', type=int, default=240, help='Steps per match in the memory benchmark')
+    parser.add_argument('--width', type=int, default=1024, help='Window width (px)')
+    parser.add_argument('--height', type=int, default=768, help='Window height (px)')
+    parser.add_argument('--speed', type=float, default=1000.0, help='Paddle speed (px/s)')
+    parser.add_argument('--max_speed', type=float, default=800.0, help='Paddle max speed (px/s)')
+    parser.add_argument('--ball_speed', type=float, default=800.0, help='Ball speed (px/s)')
+    parser.add_argument('--max_angle_variation', type=float, default=45.0, help='Max angle variation (deg)')
+    parser.add_argument('--paddle_size', type=int, default=100, help='Paddle size (px)')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args, print)
+    if args.output is not None:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results['metrics'], baseline['metrics'], args.tolerance)
+        for regression in regressions:
+            print('Regression: ' + regression)
+        if regressions:
+            sys.exit(1)
+        print('No regressions against ' + args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from paddle import Paddle
+from ball import Ball
+
+
+class CachedController:
+    def __init__(self, system, resolution: tuple[float, float] = (1.0, 1.0), max_entries: int = 65536):
+        self.system = system
+        self.name = getattr(system, 'name', type(system).__name__) + ' (cached)'
+        self.resolution = resolution
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_output(self, ball_delta_y_input: float, paddle_velocity_input: float) -> float:
+        # Outputs are computed at the centre of the quantization cell, so they do not depend on access order
+        key = (round(ball_delta_y_input / self.resolution[0]), round(paddle_velocity_input / self.resolution[1]))
+        output = self.entries.get(key)
+        if output is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return output
+        self.misses += 1
+        output = self.system.get_output(key[0] * self.resolution[0], key[1] * self.resolution[1])
+        self.entries[key] = output
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return output
+
+    def get_outputs(self, ball_delta_y_input: np.ndarray, paddle_velocity_input: np.ndarray) -> np.ndarray:
+        # Batched calls (BatchMatch, tuner) bypass the cache and are not counted in its stats
+        return self.system.get_outputs(ball_delta_y_input, paddle_velocity_input)
+
+    def move_paddle(self, paddle: Paddle, ball: Ball, delta: float) -> float:
+        ball_delta_y_input = ball.y - (paddle.y + paddle.width / 2)
+        paddle_velocity_input = paddle.velocity
+        paddle_speed_output = self.get_output(ball_delta_y_input, paddle_velocity_input)
+        paddle.move(paddle_speed_output, delta)
+        return paddle_speed_output
+
+    def counters(self) -> dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def stats(self) -> str:
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups * 100 if lookups else 0.0
+        return ('hits ' + str(self.hits) + ', misses ' + str(self.misses) + ', evictions ' + str(self.evictions)
+                + ', entries ' + str(len(self.entries)) + ', hit rate ' + '{:.1f}'.format(hit_rate) + '%')
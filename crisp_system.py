@@ -1,6 +1,10 @@
+import numpy as np
+
 from paddle import Paddle
 from ball import Ball
 
+name = 'crisp'
+
 
 def get_output(ball_delta_y_input: float, paddle_velocity_input: float) -> float:
     if ball_delta_y_input < 0:
@@ -10,6 +14,10 @@ def get_output(ball_delta_y_input: float, paddle_velocity_input: float) -> float
     else:
         return 0.0
 
+def get_outputs(ball_delta_y_input: np.ndarray, paddle_velocity_input: np.ndarray) -> np.ndarray:
+    return np.sign(np.asarray(ball_delta_y_input, dtype=np.float64))
+
+
 def move_paddle(paddle: Paddle, ball: Ball, delta: float) -> float:
     ball_delta_y_input = ball.y - (paddle.y + paddle.width / 2)
     paddle_velocity_input = paddle.velocity
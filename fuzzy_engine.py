@@ -0,0 +1,227 @@
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+
+def trimf(x: np.ndarray, abc: list[float]) -> np.ndarray:
+    a, b, c = abc
+    if not a <= b <= c:
+        raise ValueError('trimf requires a <= b <= c, got ' + str(abc))
+    y = np.zeros(len(x))
+    if a != b:
+        rising = (a < x) & (x < b)
+        y[rising] = (x[rising] - a) / float(b - a)
+    if b != c:
+        falling = (b < x) & (x < c)
+        y[falling] = (c - x[falling]) / float(c - b)
+    y[x == b] = 1.0
+    return y
+
+
+def trapmf(x: np.ndarray, abcd: list[float]) -> np.ndarray:
+    a, b, c, d = abcd
+    if not a <= b <= c <= d:
+        raise ValueError('trapmf requires a <= b <= c <= d, got ' + str(abcd))
+    y = np.ones(len(x))
+    left = x <= b
+    y[left] = trimf(x[left], [a, b, b])
+    right = x >= c
+    y[right] = trimf(x[right], [c, c, d])
+    y[(x < a) | (x > d)] = 0.0
+    return y
+
+
+class MamdaniEngine:
+    def __init__(self, inputs: list[tuple[np.ndarray, dict[str, np.ndarray]]],
+                 output: tuple[np.ndarray, dict[str, np.ndarray]], rules: list[tuple[str, ...]]):
+        self.input_universes = [np.asarray(universe, dtype=np.float64) for universe, _ in inputs]
+        self.input_terms = [list(terms) for _, terms in inputs]
+        self.input_mfs = [np.array(list(terms.values())) for _, terms in inputs]
+        self.output_universe = np.asarray(output[0], dtype=np.float64)
+        self.output_terms = list(output[1])
+        self.output_mf = np.array(list(output[1].values()))
+
+        # Rules are AND (min) of one term per input, accumulated with max into one output term
+        self.rule_inputs = np.array([[terms.index(rule[i]) for rule in rules]
+                                     for i, terms in enumerate(self.input_terms)], dtype=np.intp)
+        self.rule_output = np.array([self.output_terms.index(rule[-1]) for rule in rules], dtype=np.intp)
+        self.rule_mask = (self.rule_output[None, :] == np.arange(len(self.output_terms))[:, None]).astype(np.float64)
+
+        # Output terms are unimodal, so a cut level crosses each at most once on either side of its peak
+        self.output_peaks = [int(np.argmax(mf)) for mf in self.output_mf]
+        self._rises = [mf[:peak + 1].tolist() for mf, peak in zip(self.output_mf, self.output_peaks)]
+        self._falls = [mf[peak:][::-1].tolist() for mf, peak in zip(self.output_mf, self.output_peaks)]
+
+        self._input_universe_lists = [universe.tolist() for universe in self.input_universes]
+        self._input_mf_rows = [mf.T.copy() for mf in self.input_mfs]
+        self._output_universe_list = self.output_universe.tolist()
+        self._output_mf_lists = self.output_mf.tolist()
+
+        terms_out = len(self.output_terms)
+        size = len(self.output_universe)
+        points = size + 2 * terms_out
+        self._input_degrees = [np.empty(len(terms)) for terms in self.input_terms]
+        self._rule_degrees = np.empty(len(rules))
+        self._rule_buffer = np.empty(len(rules))
+        self._masked = np.empty((terms_out, len(rules)))
+        self._cut = np.empty((terms_out, 1))
+        self._points = np.empty(points)
+        self._position = np.empty(points)
+        self._index = np.empty(points, dtype=np.intp)
+        self._next_index = np.empty(points, dtype=np.intp)
+        self._lower = np.empty((terms_out, points))
+        self._upper = np.empty((terms_out, points))
+        self._universe_lower = np.empty(points)
+        self._universe_upper = np.empty(points)
+        self._aggregated = np.empty(points)
+        self._width = np.empty(points - 1)
+        self._area = np.empty(points - 1)
+        self._moment = np.empty(points - 1)
+        self._buffer = np.empty(points - 1)
+
+    def _crossings(self, k: int, level: float) -> tuple[float, float]:
+        universe = self._output_universe_list
+        mf = self._output_mf_lists[k]
+        peak = self.output_peaks[k]
+        rising = falling = universe[0]
+
+        rise = self._rises[k]
+        i = bisect_right(rise, level) if level == 0.0 else bisect_left(rise, level)
+        if 0 < i <= peak:
+            rising = universe[i - 1] + (level - mf[i - 1]) * (universe[i] - universe[i - 1]) / (mf[i] - mf[i - 1])
+
+        fall = self._falls[k]
+        j = bisect_right(fall, level) if level == 0.0 else bisect_left(fall, level)
+        if 0 < j < len(fall):
+            a = peak + len(fall) - 1 - j
+            falling = universe[a] + (level - mf[a]) * (universe[a + 1] - universe[a]) / (mf[a + 1] - mf[a])
+        return rising, falling
+
+    def compute(self, *values: float) -> float:
+        for universe, rows, degrees, value in zip(self._input_universe_lists, self._input_mf_rows,
+                                                  self._input_degrees, values):
+            value = min(max(value, universe[0]), universe[-1])
+            i = min(max(bisect_right(universe, value) - 1, 0), len(universe) - 2)
+            t = (value - universe[i]) / (universe[i + 1] - universe[i])
+            np.subtract(rows[i + 1], rows[i], out=degrees)
+            degrees *= t
+            degrees += rows[i]
+
+        self._input_degrees[0].take(self.rule_inputs[0], out=self._rule_degrees)
+        for degrees, rule_input in zip(self._input_degrees[1:], self.rule_inputs[1:]):
+            degrees.take(rule_input, out=self._rule_buffer)
+            np.minimum(self._rule_degrees, self._rule_buffer, out=self._rule_degrees)
+        np.multiply(self.rule_mask, self._rule_degrees, out=self._masked)
+        self._masked.max(axis=1, out=self._cut[:, 0])
+
+        # Upsample the output universe at the cut crossings, the same way skfuzzy does
+        universe = self.output_universe
+        points = self._points
+        size = len(universe)
+        points[:size] = universe
+        for k in range(len(self.output_terms)):
+            points[size + 2 * k], points[size + 2 * k + 1] = self._crossings(k, float(self._cut[k, 0]))
+        points.sort()
+
+        np.subtract(points, universe[0], out=self._position)
+        self._position /= universe[1] - universe[0]
+        np.floor(self._position, out=self._position)
+        np.maximum(self._position, 0, out=self._position)
+        np.minimum(self._position, size - 2, out=self._position)
+        np.copyto(self._index, self._position, casting='unsafe')
+        np.add(self._index, 1, out=self._next_index)
+        universe.take(self._index, out=self._universe_lower)
+        universe.take(self._next_index, out=self._universe_upper)
+        np.subtract(points, self._universe_lower, out=self._position)
+        np.subtract(self._universe_upper, self._universe_lower, out=self._universe_upper)
+        self._position /= self._universe_upper
+
+        self.output_mf.take(self._index, axis=1, out=self._lower)
+        self.output_mf.take(self._next_index, axis=1, out=self._upper)
+        self._upper -= self._lower
+        self._upper *= self._position
+        self._upper += self._lower
+        np.minimum(self._upper, self._cut, out=self._upper)
+        self._upper.max(axis=0, out=self._aggregated)
+
+        return self._centroid(points, self._aggregated)
+
+    def _centroid(self, points: np.ndarray, mf: np.ndarray) -> float:
+        x1, x2 = points[:-1], points[1:]
+        y1, y2 = mf[:-1], mf[1:]
+        np.subtract(x2, x1, out=self._width)
+        np.add(y1, y2, out=self._area)
+        self._area *= self._width
+        np.multiply(x1, 2.0, out=self._moment)
+        self._moment += x2
+        self._moment *= y1
+        np.multiply(x2, 2.0, out=self._buffer)
+        self._buffer += x1
+        self._buffer *= y2
+        self._moment += self._buffer
+        self._moment *= self._width
+        area = self._area.sum() / 2.0
+        if area == 0.0:
+            return float('nan')
+        return float(self._moment.sum() / 6.0 / area)
+
+    def _batch_degrees(self, n: int, values: np.ndarray) -> np.ndarray:
+        universe = self.input_universes[n]
+        mf = self.input_mfs[n]
+        values = np.clip(values, universe[0], universe[-1])
+        i = np.clip(np.searchsorted(universe, values, 'right') - 1, 0, len(universe) - 2)
+        t = (values - universe[i]) / (universe[i + 1] - universe[i])
+        return mf[:, i] + t * (mf[:, i + 1] - mf[:, i])
+
+    def _compute_chunk(self, values: list[np.ndarray]) -> np.ndarray:
+        activation = self._batch_degrees(0, values[0])[self.rule_inputs[0]]
+        for n in range(1, len(values)):
+            activation = np.minimum(activation, self._batch_degrees(n, values[n])[self.rule_inputs[n]])
+
+        universe = self.output_universe
+        count = len(values[0])
+        cut = np.zeros((len(self.output_terms), count))
+        for k in range(len(self.output_terms)):
+            if np.any(self.rule_output == k):
+                cut[k] = activation[self.rule_output == k].max(axis=0)
+
+        crossings = []
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for k, (mf, peak) in enumerate(zip(self.output_mf, self.output_peaks)):
+                level = cut[k]
+                rise = mf[:peak + 1]
+                i = np.where(level == 0.0, np.searchsorted(rise, level, 'right'), np.searchsorted(rise, level, 'left'))
+                valid = (i > 0) & (i <= peak)
+                i = np.clip(i, 1, max(peak, 1))
+                x = universe[i - 1] + (level - mf[i - 1]) * (universe[i] - universe[i - 1]) / (mf[i] - mf[i - 1])
+                crossings.append(np.where(valid, x, universe[0]))
+
+                fall = mf[peak:][::-1]
+                j = np.where(level == 0.0, np.searchsorted(fall, level, 'right'), np.searchsorted(fall, level, 'left'))
+                valid = (j > 0) & (j < len(fall))
+                a = np.clip(peak + len(fall) - 1 - j, 0, len(mf) - 2)
+                x = universe[a] + (level - mf[a]) * (universe[a + 1] - universe[a]) / (mf[a + 1] - mf[a])
+                crossings.append(np.where(valid, x, universe[0]))
+        points = np.concatenate([np.broadcast_to(universe, (count, len(universe))), np.array(crossings).T], axis=1)
+        points.sort(axis=1)
+
+        output_mf = np.zeros_like(points)
+        for k, mf in enumerate(self.output_mf):
+            np.maximum(output_mf, np.minimum(cut[k][:, None], np.interp(points, universe, mf)), output_mf)
+
+        x1, x2 = points[:, :-1], points[:, 1:]
+        y1, y2 = output_mf[:, :-1], output_mf[:, 1:]
+        area = 0.5 * (x2 - x1) * (y1 + y2)
+        moment = (x2 - x1) * (y1 * (2.0 * x1 + x2) + y2 * (x1 + 2.0 * x2)) / 6.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return moment.sum(axis=1) / area.sum(axis=1)
+
+    def compute_batch(self, *values: np.ndarray, chunk_size: int = 16384) -> np.ndarray:
+        values = np.broadcast_arrays(*(np.asarray(value, dtype=np.float64) for value in values))
+        shape = values[0].shape
+        values = [value.ravel() for value in values]
+        output = np.empty(values[0].size)
+        for start in range(0, output.size, chunk_size):
+            end = start + chunk_size
+            output[start:end] = self._compute_chunk([value[start:end] for value in values])
+        return output.reshape(shape)
@@ -1,89 +1,290 @@
+import hashlib
+import json
+import os
+from bisect import bisect_right
+
 import numpy as np
-import skfuzzy as fuzz
-from skfuzzy import control as ctrl
-from skfuzzy.control import visualization as vis
-import matplotlib.pyplot as plt
+from fuzzy_engine import MamdaniEngine, trapmf, trimf
 from paddle import Paddle
 from ball import Ball
 
+TABLE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+# Part of the table cache key, bump it when build_table or _table_axis change what a table contains
+TABLE_FORMAT = 1
+
+NATIVE_MFS = {'trapmf': trapmf, 'trimf': trimf}
+PADDLE_SPEED_TERMS = ['FAST_UP', 'SLOW_UP', 'ZERO', 'SLOW_DOWN', 'FAST_DOWN']
+
+# (ballDeltaY, paddleVelocity, paddleSpeed)
+RULES = [('FAR_HIGH', 'FAST_DOWN', 'FAST_UP'),
+         ('FAR_HIGH', 'SLOW_DOWN', 'FAST_UP'),
+         ('FAR_HIGH', 'ZERO', 'FAST_UP'),
+         ('FAR_HIGH', 'SLOW_UP', 'FAST_UP'),
+         ('FAR_HIGH', 'FAST_UP', 'ZERO'),
+         ('CLOSE_HIGH', 'FAST_DOWN', 'FAST_UP'),
+         ('CLOSE_HIGH', 'SLOW_DOWN', 'FAST_UP'),
+         ('CLOSE_HIGH', 'ZERO', 'SLOW_UP'),
+         ('CLOSE_HIGH', 'SLOW_UP', 'ZERO'),
+         ('CLOSE_HIGH', 'FAST_UP', 'SLOW_DOWN'),
+         ('ZERO', 'FAST_DOWN', 'FAST_UP'),
+         ('ZERO', 'SLOW_DOWN', 'SLOW_UP'),
+         ('ZERO', 'ZERO', 'ZERO'),
+         ('ZERO', 'SLOW_UP', 'SLOW_DOWN'),
+         ('ZERO', 'FAST_UP', 'FAST_DOWN'),
+         ('CLOSE_LOW', 'FAST_DOWN', 'SLOW_UP'),
+         ('CLOSE_LOW', 'SLOW_DOWN', 'ZERO'),
+         ('CLOSE_LOW', 'ZERO', 'SLOW_DOWN'),
+         ('CLOSE_LOW', 'SLOW_UP', 'FAST_DOWN'),
+         ('CLOSE_LOW', 'FAST_UP', 'FAST_DOWN'),
+         ('FAR_LOW', 'FAST_DOWN', 'ZERO'),
+         ('FAR_LOW', 'SLOW_DOWN', 'FAST_DOWN'),
+         ('FAR_LOW', 'ZERO', 'FAST_DOWN'),
+         ('FAR_LOW', 'SLOW_UP', 'FAST_DOWN'),
+         ('FAR_LOW', 'FAST_UP', 'FAST_DOWN')]
+
 
 class FuzzySystem:
-    def __init__(self, screen_height: int, paddle_size: int, max_speed: float, ball_speed: float, view: bool = False):
+    name = 'fuzzy'
+
+    def __init__(self, screen_height: int, paddle_size: int, max_speed: float, ball_speed: float, view: bool = False,
+                 compiled: bool = False, table_file: str | None = None, table_steps: int = 129,
+                 config: dict | None = None):
         self.view = view
-        ball_delta_y = ctrl.Antecedent(np.arange(-screen_height, screen_height, 0.5), 'ballDeltaY')
-        ball_delta_y['FAR_HIGH'] = fuzz.trapmf(ball_delta_y.universe,
-                                               [-screen_height, -screen_height, -paddle_size // 2, -paddle_size // 3])
-        ball_delta_y['CLOSE_HIGH'] = fuzz.trapmf(ball_delta_y.universe,
-                                                 [-paddle_size // 2, -paddle_size // 3, -0.5, -0.5])
-        ball_delta_y['ZERO'] = fuzz.trapmf(ball_delta_y.universe, [-0.5, -0.5, 0.5, 0.5])
-        ball_delta_y['CLOSE_LOW'] = fuzz.trapmf(ball_delta_y.universe, [0.5, 0.5, paddle_size // 3, paddle_size // 2])
-        ball_delta_y['FAR_LOW'] = fuzz.trapmf(ball_delta_y.universe,
-                                              [paddle_size // 3, paddle_size // 2, screen_height, screen_height])
-        if view:
-            ball_delta_y.view()
-
-        paddle_velocity = ctrl.Antecedent(np.arange(-max_speed, max_speed, 0.1), 'paddleVelocity')
-        paddle_velocity['FAST_UP'] = fuzz.trapmf(paddle_velocity.universe,
-                                                 [-max_speed, -max_speed, -ball_speed / 2, -ball_speed / 4])
-        paddle_velocity['SLOW_UP'] = fuzz.trapmf(paddle_velocity.universe,
-                                                 [-ball_speed / 2, -ball_speed / 4, -0.1, -0.1])
-        paddle_velocity['ZERO'] = fuzz.trapmf(paddle_velocity.universe, [-0.1, -0.1, 0.1, 0.1])
-        paddle_velocity['SLOW_DOWN'] = fuzz.trapmf(paddle_velocity.universe, [0.1, 0.1, ball_speed / 4, ball_speed / 2])
-        paddle_velocity['FAST_DOWN'] = fuzz.trapmf(paddle_velocity.universe,
-                                                   [ball_speed / 4, ball_speed / 2, max_speed, max_speed])
-        if view:
-            paddle_velocity.view()
-
-        paddle_speed = ctrl.Consequent(np.arange(-2.0, 2.0, 0.1), 'paddleSpeed')
-        paddle_speed['FAST_UP'] = fuzz.trimf(paddle_speed.universe, [-2.0, -2.0, -1.0])
-        paddle_speed['SLOW_UP'] = fuzz.trapmf(paddle_speed.universe, [-1.2, -1.0, -0.1, -0.1])
-        paddle_speed['ZERO'] = fuzz.trapmf(paddle_speed.universe, [-0.1, -0.1, 0.1, 0.1])
-        paddle_speed['SLOW_DOWN'] = fuzz.trapmf(paddle_speed.universe, [0.1, 0.1, 1.0, 1.2])
-        paddle_speed['FAST_DOWN'] = fuzz.trimf(paddle_speed.universe, [1.0, 2.0, 2.0])
+        self.params = np.array([screen_height, paddle_size, max_speed, ball_speed], dtype=np.float64)
+        if config is None:
+            config = self.default_config(paddle_size, ball_speed)
+        self.check_config(config, screen_height, max_speed)
+        self.config = config
+        self.rules = [(ball_delta_y_term, paddle_velocity_term, paddle_speed_term)
+                      for (ball_delta_y_term, paddle_velocity_term, _), paddle_speed_term
+                      in zip(RULES, config['rules'])]
+
+        self.ball_delta_y_universe = np.arange(-screen_height, screen_height, 0.5)
+        far_high, close_high, close_low, far_low = config['ball_delta_y']
+        self.ball_delta_y_shapes = {
+            'FAR_HIGH': ('trapmf', [-screen_height, -screen_height, far_high, close_high]),
+            'CLOSE_HIGH': ('trapmf', [far_high, close_high, -0.5, -0.5]),
+            'ZERO': ('trapmf', [-0.5, -0.5, 0.5, 0.5]),
+            'CLOSE_LOW': ('trapmf', [0.5, 0.5, close_low, far_low]),
+            'FAR_LOW': ('trapmf', [close_low, far_low, screen_height, screen_height])}
+
+        self.paddle_velocity_universe = np.arange(-max_speed, max_speed, 0.1)
+        fast_up, slow_up, slow_down, fast_down = config['paddle_velocity']
+        self.paddle_velocity_shapes = {
+            'FAST_UP': ('trapmf', [-max_speed, -max_speed, fast_up, slow_up]),
+            'SLOW_UP': ('trapmf', [fast_up, slow_up, -0.1, -0.1]),
+            'ZERO': ('trapmf', [-0.1, -0.1, 0.1, 0.1]),
+            'SLOW_DOWN': ('trapmf', [0.1, 0.1, slow_down, fast_down]),
+            'FAST_DOWN': ('trapmf', [slow_down, fast_down, max_speed, max_speed])}
+
+        self.paddle_speed_universe = np.arange(-2.0, 2.0, 0.1)
+        self.paddle_speed_shapes = {
+            'FAST_UP': ('trimf', [-2.0, -2.0, -1.0]),
+            'SLOW_UP': ('trapmf', [-1.2, -1.0, -0.1, -0.1]),
+            'ZERO': ('trapmf', [-0.1, -0.1, 0.1, 0.1]),
+            'SLOW_DOWN': ('trapmf', [0.1, 0.1, 1.0, 1.2]),
+            'FAST_DOWN': ('trimf', [1.0, 2.0, 2.0])}
+
+        self.ball_delta_y_terms = self.membership(self.ball_delta_y_universe, self.ball_delta_y_shapes, NATIVE_MFS)
+        self.paddle_velocity_terms = self.membership(self.paddle_velocity_universe, self.paddle_velocity_shapes,
+                                                     NATIVE_MFS)
+        self.paddle_speed_terms = self.membership(self.paddle_speed_universe, self.paddle_speed_shapes, NATIVE_MFS)
+
+        self.engine = MamdaniEngine([(self.ball_delta_y_universe, self.ball_delta_y_terms),
+                                     (self.paddle_velocity_universe, self.paddle_velocity_terms)],
+                                    (self.paddle_speed_universe, self.paddle_speed_terms), self.rules)
+
+        self._paddle_ctrl = None
         if view:
-            paddle_speed.view()
-
-        self.fuzzy_rules = [ctrl.Rule(ball_delta_y['FAR_HIGH'] & paddle_velocity['FAST_DOWN'], paddle_speed['FAST_UP']),
-                            ctrl.Rule(ball_delta_y['FAR_HIGH'] & paddle_velocity['SLOW_DOWN'], paddle_speed['FAST_UP']),
-                            ctrl.Rule(ball_delta_y['FAR_HIGH'] & paddle_velocity['ZERO'], paddle_speed['FAST_UP']),
-                            ctrl.Rule(ball_delta_y['FAR_HIGH'] & paddle_velocity['SLOW_UP'], paddle_speed['FAST_UP']),
-                            ctrl.Rule(ball_delta_y['FAR_HIGH'] & paddle_velocity['FAST_UP'], paddle_speed['ZERO']),
-                            ctrl.Rule(ball_delta_y['CLOSE_HIGH'] & paddle_velocity['FAST_DOWN'],
-                                      paddle_speed['FAST_UP']),
-                            ctrl.Rule(ball_delta_y['CLOSE_HIGH'] & paddle_velocity['SLOW_DOWN'],
-                                      paddle_speed['FAST_UP']),
-                            ctrl.Rule(ball_delta_y['CLOSE_HIGH'] & paddle_velocity['ZERO'], paddle_speed['SLOW_UP']),
-                            ctrl.Rule(ball_delta_y['CLOSE_HIGH'] & paddle_velocity['SLOW_UP'], paddle_speed['ZERO']),
-                            ctrl.Rule(ball_delta_y['CLOSE_HIGH'] & paddle_velocity['FAST_UP'],
-                                      paddle_speed['SLOW_DOWN']),
-                            ctrl.Rule(ball_delta_y['ZERO'] & paddle_velocity['FAST_DOWN'], paddle_speed['FAST_UP']),
-                            ctrl.Rule(ball_delta_y['ZERO'] & paddle_velocity['SLOW_DOWN'], paddle_speed['SLOW_UP']),
-                            ctrl.Rule(ball_delta_y['ZERO'] & paddle_velocity['ZERO'], paddle_speed['ZERO']),
-                            ctrl.Rule(ball_delta_y['ZERO'] & paddle_velocity['SLOW_UP'], paddle_speed['SLOW_DOWN']),
-                            ctrl.Rule(ball_delta_y['ZERO'] & paddle_velocity['FAST_UP'], paddle_speed['FAST_DOWN']),
-                            ctrl.Rule(ball_delta_y['CLOSE_LOW'] & paddle_velocity['FAST_DOWN'],
-                                      paddle_speed['SLOW_UP']),
-                            ctrl.Rule(ball_delta_y['CLOSE_LOW'] & paddle_velocity['SLOW_DOWN'], paddle_speed['ZERO']),
-                            ctrl.Rule(ball_delta_y['CLOSE_LOW'] & paddle_velocity['ZERO'], paddle_speed['SLOW_DOWN']),
-                            ctrl.Rule(ball_delta_y['CLOSE_LOW'] & paddle_velocity['SLOW_UP'],
-                                      paddle_speed['FAST_DOWN']),
-                            ctrl.Rule(ball_delta_y['CLOSE_LOW'] & paddle_velocity['FAST_UP'],
-                                      paddle_speed['FAST_DOWN']),
-                            ctrl.Rule(ball_delta_y['FAR_LOW'] & paddle_velocity['FAST_DOWN'], paddle_speed['ZERO']),
-                            ctrl.Rule(ball_delta_y['FAR_LOW'] & paddle_velocity['SLOW_DOWN'],
-                                      paddle_speed['FAST_DOWN']),
-                            ctrl.Rule(ball_delta_y['FAR_LOW'] & paddle_velocity['ZERO'], paddle_speed['FAST_DOWN']),
-                            ctrl.Rule(ball_delta_y['FAR_LOW'] & paddle_velocity['SLOW_UP'], paddle_speed['FAST_DOWN']),
-                            ctrl.Rule(ball_delta_y['FAR_LOW'] & paddle_velocity['FAST_UP'], paddle_speed['FAST_DOWN'])]
-
-        self.paddle_ctrl = ctrl.ControlSystem(self.fuzzy_rules)
-        self.paddle_simulation = ctrl.ControlSystemSimulation(self.paddle_ctrl)
+            self.view_system()
+
+        self.table = None
+        self.table_ball_delta_y = None
+        self.table_paddle_velocity = None
+        self.table_max_error = None
+        self.table_mean_error = None
+        if compiled:
+            if table_file is None:
+                table_file = self.table_cache_path(table_steps)
+            if os.path.exists(table_file):
+                self.load_table(table_file)
+            else:
+                self.build_table(table_steps)
+                self.save_table(table_file)
+
+    @staticmethod
+    def default_config(paddle_size: int, ball_speed: float) -> dict:
+        # Breakpoints between the far and close ballDeltaY terms and the fast and slow paddleVelocity terms
+        return {'ball_delta_y': [-paddle_size // 2, -paddle_size // 3, paddle_size // 3, paddle_size // 2],
+                'paddle_velocity': [-ball_speed / 2, -ball_speed / 4, ball_speed / 4, ball_speed / 2],
+                'rules': [paddle_speed_term for _, _, paddle_speed_term in RULES]}
+
+    @staticmethod
+    def check_config(config: dict, screen_height: int, max_speed: float):
+        missing = {'ball_delta_y', 'paddle_velocity', 'rules'} - set(config)
+        if missing:
+            raise ValueError('Fuzzy config is missing ' + ', '.join(sorted(missing)))
+        if len(config['rules']) != len(RULES):
+            raise ValueError('Fuzzy config has ' + str(len(config['rules'])) + ' rules, expected ' + str(len(RULES)))
+        for term in config['rules']:
+            if term not in PADDLE_SPEED_TERMS:
+                raise ValueError('Unknown paddleSpeed term in fuzzy config: ' + str(term))
+        for name, limit, gap in [('ball_delta_y', screen_height, 0.5), ('paddle_velocity', max_speed, 0.1)]:
+            breakpoints = config[name]
+            if len(breakpoints) != 4 or not (-limit <= breakpoints[0] <= breakpoints[1] <= -gap
+                                             and gap <= breakpoints[2] <= breakpoints[3] <= limit):
+                raise ValueError('Fuzzy config ' + name + ' breakpoints must be ordered within [' + str(-limit)
+                                 + ', ' + str(-gap) + '] and [' + str(gap) + ', ' + str(limit) + ']: '
+                                 + str(breakpoints))
+
+    @staticmethod
+    def load_config(path: str) -> dict:
+        with open(path) as config_file:
+            return json.load(config_file)['config']
+
+    @staticmethod
+    def save_config(path: str, config: dict, **info):
+        with open(path, 'w') as config_file:
+            json.dump({'config': config, **info}, config_file, indent=2)
+
+    @staticmethod
+    def membership(universe: np.ndarray, shapes: dict[str, tuple[str, list[float]]],
+                   functions: dict) -> dict[str, np.ndarray]:
+        return {label: functions[kind](universe, points) for label, (kind, points) in shapes.items()}
+
+    @staticmethod
+    def skfuzzy_mfs() -> dict:
+        from skfuzzy import membership
+
+        return {'trapmf': membership.trapmf, 'trimf': membership.trimf}
+
+    def control_system(self):
+        # The scikit-fuzzy reference uses its own membership functions, independent of the native engine
+        if self._paddle_ctrl is None:
+            from skfuzzy import control as ctrl
+
+            ball_delta_y = ctrl.Antecedent(self.ball_delta_y_universe, 'ballDeltaY')
+            paddle_velocity = ctrl.Antecedent(self.paddle_velocity_universe, 'paddleVelocity')
+            paddle_speed = ctrl.Consequent(self.paddle_speed_universe, 'paddleSpeed')
+            for variable, shapes in [(ball_delta_y, self.ball_delta_y_shapes),
+                                     (paddle_velocity, self.paddle_velocity_shapes),
+                                     (paddle_speed, self.paddle_speed_shapes)]:
+                for label, mf in self.membership(variable.universe, shapes, self.skfuzzy_mfs()).items():
+                    variable[label] = mf
+            rules = [ctrl.Rule(ball_delta_y[ball_delta_y_term] & paddle_velocity[paddle_velocity_term],
+                               paddle_speed[paddle_speed_term])
+                     for ball_delta_y_term, paddle_velocity_term, paddle_speed_term in self.rules]
+            self._paddle_ctrl = ctrl.ControlSystem(rules)
+        return self._paddle_ctrl
+
+    def view_system(self):
+        for variable in self.control_system().fuzzy_variables:
+            variable.view()
+
+    @staticmethod
+    def _table_axis(universe: np.ndarray, terms: dict[str, np.ndarray], steps: int) -> np.ndarray:
+        points = [np.linspace(universe[0], universe[-1], steps)]
+        for mf in terms.values():
+            kinks = np.nonzero(np.abs(np.diff(mf, 2)) > 1e-9)[0] + 1
+            points.append(universe[kinks])
+        return np.unique(np.concatenate(points))
+
+    def compute_exact(self, ball_delta_y_input: np.ndarray, paddle_velocity_input: np.ndarray) -> np.ndarray:
+        from skfuzzy import control as ctrl
+
+        simulation = ctrl.ControlSystemSimulation(self.control_system())
+        simulation.input['ballDeltaY'] = np.asarray(ball_delta_y_input, dtype=np.float64)
+        simulation.input['paddleVelocity'] = np.asarray(paddle_velocity_input, dtype=np.float64)
+        simulation.compute()
+        return simulation.output['paddleSpeed']
+
+    def build_table(self, steps: int = 129):
+        xs = self._table_axis(self.ball_delta_y_universe, self.ball_delta_y_terms, steps)
+        ys = self._table_axis(self.paddle_velocity_universe, self.paddle_velocity_terms, steps)
+        grid_x, grid_y = np.meshgrid(xs, ys, indexing='ij')
+        self.table = None
+        self._set_table(xs, ys, self.get_outputs(grid_x, grid_y))
+
+        mid_x, mid_y = np.meshgrid((xs[:-1] + xs[1:]) / 2, (ys[:-1] + ys[1:]) / 2, indexing='ij')
+        error = np.abs(self.interpolate(mid_x, mid_y) - self.compute_exact(mid_x, mid_y))
+        self.table_max_error = float(error.max())
+        self.table_mean_error = float(error.mean())
+
+    def table_cache_path(self, steps: int) -> str:
+        key = hashlib.sha1(self.params.tobytes() + json.dumps(self.config, sort_keys=True).encode()
+                           + str(steps).encode() + str(TABLE_FORMAT).encode()).hexdigest()[:16]
+        return os.path.join(TABLE_CACHE_DIR, 'fuzzy-table-' + key + '.npz')
+
+    def save_table(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write then rename so concurrent processes never load a partially written table
+        temp_path = path + '.' + str(os.getpid()) + '.tmp'
+        with open(temp_path, 'wb') as table_file:
+            np.savez(table_file, params=self.params, config=np.array(json.dumps(self.config, sort_keys=True)),
+                     ball_delta_y=self.table_ball_delta_y,
+                     paddle_velocity=self.table_paddle_velocity, table=self.table,
+                     error=np.array([self.table_max_error, self.table_mean_error]))
+        os.replace(temp_path, path)
+
+    def load_table(self, path: str):
+        with np.load(path) as data:
+            if not np.array_equal(data['params'], self.params):
+                raise ValueError('Table ' + path + ' was built for different parameters: ' + str(data['params']))
+            if 'config' not in data.files or str(data['config']) != json.dumps(self.config, sort_keys=True):
+                raise ValueError('Table ' + path + ' was built for a different fuzzy config')
+            self._set_table(data['ball_delta_y'], data['paddle_velocity'], data['table'])
+            self.table_max_error, self.table_mean_error = (float(e) for e in data['error'])
+
+    def _set_table(self, ball_delta_y: np.ndarray, paddle_velocity: np.ndarray, table: np.ndarray):
+        self.table_ball_delta_y = ball_delta_y
+        self.table_paddle_velocity = paddle_velocity
+        self.table = table
+        # Python lists for the scalar lookup, which is faster on them than NumPy on 0-d arrays
+        self._table_xs = ball_delta_y.tolist()
+        self._table_ys = paddle_velocity.tolist()
+        self._table_rows = table.tolist()
+
+    def _interpolate_scalar(self, ball_delta_y_input: float, paddle_velocity_input: float) -> float:
+        xs = self._table_xs
+        ys = self._table_ys
+        x = min(max(ball_delta_y_input, xs[0]), xs[-1])
+        y = min(max(paddle_velocity_input, ys[0]), ys[-1])
+        i = min(max(bisect_right(xs, x) - 1, 0), len(xs) - 2)
+        j = min(max(bisect_right(ys, y) - 1, 0), len(ys) - 2)
+        tx = (x - xs[i]) / (xs[i + 1] - xs[i])
+        ty = (y - ys[j]) / (ys[j + 1] - ys[j])
+        row = self._table_rows[i]
+        next_row = self._table_rows[i + 1]
+        return ((1 - tx) * ((1 - ty) * row[j] + ty * row[j + 1])
+                + tx * ((1 - ty) * next_row[j] + ty * next_row[j + 1]))
+
+    def interpolate(self, ball_delta_y_input: float | np.ndarray,
+                    paddle_velocity_input: float | np.ndarray) -> float | np.ndarray:
+        xs = self.table_ball_delta_y
+        ys = self.table_paddle_velocity
+        x = np.clip(ball_delta_y_input, xs[0], xs[-1])
+        y = np.clip(paddle_velocity_input, ys[0], ys[-1])
+        i = np.clip(np.searchsorted(xs, x, side='right') - 1, 0, len(xs) - 2)
+        j = np.clip(np.searchsorted(ys, y, side='right') - 1, 0, len(ys) - 2)
+        tx = (x - xs[i]) / (xs[i + 1] - xs[i])
+        ty = (y - ys[j]) / (ys[j + 1] - ys[j])
+        table = self.table
+        return ((1 - tx) * ((1 - ty) * table[i, j] + ty * table[i, j + 1])
+                + tx * ((1 - ty) * table[i + 1, j] + ty * table[i + 1, j + 1]))
+
+    def get_outputs(self, ball_delta_y_input: np.ndarray, paddle_velocity_input: np.ndarray,
+                    chunk_size: int = 16384) -> np.ndarray:
+        if self.table is not None:
+            return self.interpolate(np.asarray(ball_delta_y_input, dtype=np.float64),
+                                    np.asarray(paddle_velocity_input, dtype=np.float64))
+        return self.engine.compute_batch(ball_delta_y_input, paddle_velocity_input, chunk_size=chunk_size)
 
     def get_output(self, ball_delta_y_input: float, paddle_velocity_input: float) -> float:
-        self.paddle_simulation.input['ballDeltaY'] = ball_delta_y_input
-        self.paddle_simulation.input['paddleVelocity'] = paddle_velocity_input
-        self.paddle_simulation.compute()
-        return self.paddle_simulation.output['paddleSpeed']
+        if self.table is not None:
+            return self._interpolate_scalar(ball_delta_y_input, paddle_velocity_input)
+        return self.engine.compute(ball_delta_y_input, paddle_velocity_input)
 
     def move_paddle(self, paddle: Paddle, ball: Ball, delta: float) -> float:
         ball_delta_y_input = ball.y - (paddle.y + paddle.width / 2)
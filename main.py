@@ -1,17 +1,22 @@
+import time
+
+# Taken before the other imports so the logged startup time includes them
+STARTUP_START = time.perf_counter()
+
 import argparse
-import random
 import os
+import random
 from datetime import datetime
 
-import pygame as pg
-import pygame.event
-from matplotlib import pyplot as plt
-
-from ball import Ball
-from paddle import Paddle
+from match import Match, DEFAULT_TIMESTEP
+from controller_cache import CachedController
 import crisp_system
 from fuzzy_system import FuzzySystem
 
+PLAYBACK_ARGS = ['nogui', 'log', 'view', 'record', 'replay', 'seek', 'playback_rate', 'fps', 'tournament', 'profile',
+                 'profile_output', 'cprofile', 'telemetry']
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--paddle1', type=str, default='input', help='Paddle 1 movement system (input, crisp, fuzzy)')
@@ -27,11 +32,62 @@ def main():
     parser.add_argument('--games', type=int, default=1, help='Number of games to play')
     parser.add_argument('--ball-reset', type=int, default=None, help='Ball reset time (s)')
     parser.add_argument('--log', type=str, default=None, help='Name of log file (no logging by default)')
+    parser.add_argument('--cache', type=int, default=None,
+                        help='Cache up to this many fuzzy outputs on quantized inputs (no cache by default)')
+    parser.add_argument('--cache_resolution', type=float, nargs=2, default=[1.0, 1.0],
+                        help='Fuzzy cache quantization step for ball delta (px) and paddle velocity (px/s)')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed, game i uses seed + i (random by default)')
+    parser.add_argument('--timestep', type=float, default=None,
+                        help='Fixed simulation timestep (s), headless runs default to ' + str(DEFAULT_TIMESTEP))
+    parser.add_argument('--physics', type=str, default='step', choices=['step', 'event'],
+                        help='Headless physics: step the ball every --timestep, or move it from event to event '
+                             'while paddles and controllers update every --timestep')
+    parser.add_argument('--control_rate', type=float, default=None,
+                        help='Evaluate paddle systems at this fixed rate (Hz) and hold their output in between '
+                             '(every simulation step by default)')
+    parser.add_argument('--max_time', type=float, default=None, help='Max simulated time per headless game (s)')
+    parser.add_argument('--tournament', type=str, default=None,
+                        help='Comma separated paddle systems to play round-robin --games times each (headless)')
+    parser.add_argument('--workers', type=int, default=None, help='Tournament worker processes (all cores by default)')
+    parser.add_argument('--report', type=str, default=None, help='Tournament JSON report file')
+    parser.add_argument('--profile', action='store_true',
+                        help='Time each frame phase and paddle system, print percentiles at the end')
+    parser.add_argument('--profile_output', type=str, default=None, help='Profile summary JSON file')
+    parser.add_argument('--cprofile', type=str, default=None, help='cProfile stats dump file')
+    parser.add_argument('--telemetry', type=str, default=None,
+                        help='Directory to record per-frame ball, paddle and controller telemetry to')
+    parser.add_argument('--record', type=str, default=None,
+                        help='Record seeds, settings, frame deltas and keyboard input to this file (.npz)')
+    parser.add_argument('--snapshot_interval', type=int, default=1000, help='Steps between recorded state snapshots')
+    parser.add_argument('--replay', type=str, default=None, help='Replay a recording, headless with --nogui')
+    parser.add_argument('--seek', type=int, default=None, help='Step to jump to in each replayed game')
+    parser.add_argument('--playback_rate', type=float, default=1.0, help='Rendered replay speed multiplier')
+    parser.add_argument('--fps', type=int, default=None,
+                        help='Max rendered frames per second (uncapped by default), with --timestep the simulation '
+                             'keeps its own fixed rate')
     parser.add_argument('--nogui', action='store_true', help='Disable GUI and log events to console')
     parser.add_argument('--view', action='store_true', help='View fuzzy system')
+    parser.add_argument('--compiled', action='store_true', help='Use a precomputed fuzzy control surface table')
+    parser.add_argument('--table', type=str, default=None,
+                        help='Fuzzy control surface table file (.npz), loaded if it exists, saved otherwise '
+                             '(cached by parameters in the cache directory next to fuzzy_system.py by default)')
+    parser.add_argument('--fuzzy_config', type=str, default=None,
+                        help='Fuzzy breakpoints and rule outputs saved by tuner.py (hand-picked by default)')
+    parser.add_argument('--table_steps', type=int, default=129, help='Fuzzy control surface table steps per input')
 
     args = parser.parse_args()
 
+    replay = None
+    if args.replay is not None:
+        # Simulation settings come from the recording, playback and output settings from the command line
+        from replay import Replay
+        replay = Replay(args.replay)
+        playback = {key: getattr(args, key) for key in PLAYBACK_ARGS}
+        args = argparse.Namespace(**{**vars(replay.args), **playback})
+        args.games = len(replay.games)
+    if args.record is not None and args.seed is None:
+        args.seed = random.randrange(2 ** 32)
+
     start_time = datetime.now()
 
     log_file = None
@@ -47,7 +103,21 @@ def main():
         if args.nogui:
             print(message)
 
-    if args.nogui and (args.paddle1 == 'input' or args.paddle2 == 'input'):
+    if args.tournament is not None:
+        from tournament import run_tournament, SYSTEMS
+        args.nogui = True
+        systems = args.tournament.split(',')
+        if any(system not in SYSTEMS for system in systems):
+            log('Tournament systems must be chosen from: ' + ', '.join(SYSTEMS))
+            return
+        if args.score == -1 and args.max_time is None:
+            log('Tournament games need --score or --max_time to end')
+            return
+        run_tournament(args, systems, log)
+        log('Time elapsed: ' + str(datetime.now() - start_time))
+        return
+
+    if args.nogui and replay is None and (args.paddle1 == 'input' or args.paddle2 == 'input'):
         log('Input system cannot be used without GUI, use a different system with --paddle1 and --paddle2')
         return
 
@@ -64,64 +134,114 @@ def main():
 
     games_won = [0, 0]
 
+    # Built once per process and shared by every game
+    fuzzy_system = None
+    if args.view or 'fuzzy' in (args.paddle1, args.paddle2):
+        config = FuzzySystem.load_config(args.fuzzy_config) if args.fuzzy_config is not None else None
+        fuzzy_system = FuzzySystem(args.height, args.paddle_size, args.max_speed, args.ball_speed, args.view,
+                                   args.compiled, args.table, args.table_steps, config)
+        if args.compiled:
+            log('Fuzzy table error: max ' + '{:.4f}'.format(fuzzy_system.table_max_error)
+                + ', mean ' + '{:.4f}'.format(fuzzy_system.table_mean_error))
+        if args.cache is not None:
+            fuzzy_system = CachedController(fuzzy_system, tuple(args.cache_resolution), args.cache)
+
+    paddle1_system = args.paddle1
+    paddle2_system = args.paddle2
+
+    if paddle1_system == 'crisp':
+        paddle1_system = crisp_system
+    if paddle2_system == 'crisp':
+        paddle2_system = crisp_system
+    if paddle1_system == 'fuzzy':
+        paddle1_system = fuzzy_system
+    if paddle2_system == 'fuzzy':
+        paddle2_system = fuzzy_system
+
+    profiler = None
+    if args.profile:
+        from profiler import FrameProfiler
+        profiler = FrameProfiler()
+    profile = None
+    if args.cprofile is not None:
+        import cProfile
+        profile = cProfile.Profile()
+        profile.enable()
+
+    recorder = None
+    if args.telemetry is not None:
+        from telemetry import TelemetryRecorder
+        recorder = TelemetryRecorder(args.telemetry)
+    recording = None
+    if args.record is not None:
+        from replay import MatchRecorder
+        recording = MatchRecorder(args, args.snapshot_interval)
+
+    if not args.nogui:
+        import pygame as pg
+        from renderer import Renderer
+    if args.view and not args.nogui:
+        from matplotlib import pyplot as plt
+
+    startup_time = time.perf_counter() - STARTUP_START
+    log('Startup time: ' + '{:.3f}'.format(startup_time) + ' s')
+    if profiler is not None:
+        profiler.record('startup', int(startup_time * 1e9))
+
     for i in range(args.games):
         log('Game ' + str(i + 1) + ' started')
 
-        score = [0, 0]
-        paddle1 = Paddle(10, args.height // 2 - 50, args.paddle_size, args.speed, args.max_speed)
-        paddle2 = Paddle(args.width - 20, args.height // 2 - 50, args.paddle_size, args.speed, args.max_speed)
-        ball = Ball(args.width // 2, args.height // 2, 5, args.ball_speed/2)
-
-        clock = pg.time.Clock()
-        time_since_ball_spawn = 0
-
-        def reset_ball():
-            ball.x = args.width / 2.0
-            ball.y = args.height / 2.0
-            ball.speed = args.ball_speed / 2
-            ball.angle = random.randint(0, 360)
-
-        fuzzy_system = FuzzySystem(args.height, args.paddle_size, args.max_speed, args.ball_speed, args.view)
-
-        paddle1_system = args.paddle1
-        paddle2_system = args.paddle2
-
-        if paddle1_system == 'crisp':
-            paddle1_system = crisp_system
-        if paddle2_system == 'crisp':
-            paddle2_system = crisp_system
-        if paddle1_system == 'fuzzy':
-            paddle1_system = fuzzy_system
-        if paddle2_system == 'fuzzy':
-            paddle2_system = fuzzy_system
-
-        font = None
-        screen = None
-        if not args.nogui:
-            plt.show()
+        seed = None if args.seed is None else args.seed + i
+        if replay is not None:
+            seed = replay.games[i]['seed']
+        match = Match.from_args(args, paddle1_system, paddle2_system, seed, log)
+        if recording is not None:
+            recording.start_game(match, args.nogui and args.physics == 'event')
+        if replay is not None and args.seek is not None:
+            replay.seek(i, match, args.seek)
+        match.profiler = profiler
+        match.recorder = recorder
+        if recorder is not None:
+            recorder.game = i
+        paddle1 = match.paddle1
+        paddle2 = match.paddle2
+        ball = match.ball
+        score = match.score
+
+        if args.nogui and replay is not None:
+            if replay.play(i, match):
+                log('Replay matches recorded score ' + str(match.score))
+            else:
+                log('Replay diverged: recorded ' + str(replay.games[i]['score']) + ', replayed ' + str(match.score))
+        elif args.nogui:
+            match.run(args.timestep or DEFAULT_TIMESTEP, args.max_time, args.physics == 'event')
+        else:
+            if args.view:
+                plt.show()
             pg.init()
             font = pg.font.Font("freesansbold.ttf", 32)
             screen = pg.display.set_mode((args.width, args.height))
             pg.display.set_caption("Fuzzy Pong")
-
-        up_pressed = False
-        down_pressed = False
-        left_pressed = False
-        right_pressed = False
-        shift_pressed = False
-
-        running = True
-        while running:
-            delta_ms = clock.tick()
-            delta = delta_ms / 1000
-            time_since_ball_spawn += delta_ms
-            if args.ball_reset is not None and time_since_ball_spawn >= args.ball_reset * 1000:
-                log('Ball reset after ' + str(time_since_ball_spawn/1000) + ' seconds')
-                reset_ball()
-                time_since_ball_spawn = 0
-            speed = 0
-            if not args.nogui:
-                for event in pygame.event.get():
+            renderer = Renderer(screen, font)
+
+            clock = pg.time.Clock()
+            accumulator = 0.0
+            playback_time = match.time
+
+            up_pressed = False
+            down_pressed = False
+            left_pressed = False
+            right_pressed = False
+            shift_pressed = False
+
+            running = True
+            while running:
+                delta_ms = clock.tick(args.fps or 0)
+                delta = delta_ms / 1000
+                if profiler is not None:
+                    frame_start = mark = profiler.now()
+                speed = 0
+                for event in pg.event.get():
                     if event.type == pg.QUIT:
                         running = False
                         break
@@ -157,109 +277,85 @@ def main():
                     if shift_pressed:
                         speed = 2
 
-            paddle_speed_outputs = []
+                spin = 0
+                if left_pressed and not right_pressed:
+                    spin = -1
+                if right_pressed and not left_pressed:
+                    spin = 1
 
-            for (paddle_system, paddle) in [(paddle1_system, paddle1), (paddle2_system, paddle2)]:
-                if paddle_system == 'input':
-                    paddle.move(speed, delta)
-                    paddle_speed_outputs.append(speed)
-                else:
-                    paddle_speed_outputs.append(paddle_system.move_paddle(paddle, ball, delta))
+                if profiler is not None:
+                    profiler.record('events', profiler.now() - mark)
 
-            if left_pressed and not right_pressed:
-                ball.angle -= 1
-            if right_pressed and not left_pressed:
-                ball.angle += 1
-
-            if not args.nogui:
-                pg.draw.rect(screen, (0, 0, 0), (0, 0, args.width, args.height))
-            for paddle in [paddle1, paddle2]:
-                paddle.update(delta)
-                if paddle.y <= 0.0:
-                    paddle.y = 0.0
-                    paddle.velocity = 0.0
-                if paddle.y >= args.height - paddle.width:
-                    paddle.y = args.height - paddle.width
-                    paddle.velocity = 0.0
-
-            ball.update(delta)
-
-            if ball.y <= 0.0 or ball.y >= args.height:
-                ball.angle = 360.0 - ball.angle
-            if ball.x <= 0.0:
-                score[1] += 1
-                if args.log:
-                    log('Paddle 2 scored: ' + str(score))
-                reset_ball()
-                time_since_ball_spawn = 0
-            if ball.x >= args.width:
-                score[0] += 1
-                if args.log:
-                    log('Paddle 1 scored: ' + str(score))
-                reset_ball()
-                time_since_ball_spawn = 0
-            if paddle1.x <= ball.x <= paddle1.x + 10 and paddle1.y <= ball.y <= paddle1.y + paddle1.width:
-                angle_variation = (ball.y - paddle1.y) / (paddle1.width / 2) - 1
-                ball.angle = 180.0 - ball.angle + angle_variation * args.max_angle_variation
-                ball.speed = args.ball_speed
-            if paddle2.x >= ball.x >= paddle2.x - 10 and paddle2.y <= ball.y <= paddle2.y + paddle2.width:
-                angle_variation = (ball.y - paddle2.y) / (paddle2.width / 2) - 1
-                ball.angle = 180.0 - ball.angle - angle_variation * args.max_angle_variation
-                ball.speed = args.ball_speed
-
-            if args.score != -1 and (score[0] >= args.score or score[1] >= args.score):
-                if args.log:
-                    log('Game ended')
-                    log(str(score))
-                running = False
-                if score[0] > score[1]:
-                    games_won[0] += 1
+                if replay is not None:
+                    playback_time += delta * args.playback_rate
+                    while match.time < playback_time and replay.step(i, match):
+                        pass
+                    if match.steps >= replay.length(i):
+                        running = False
+                elif args.timestep is None:
+                    match.step(delta, speed, spin)
                 else:
-                    games_won[1] += 1
-                break
-
-            ball_delta_y_input = ball.y - (paddle1.y + paddle1.width / 2)
-            ball_delta_y_input_2 = ball.y - (paddle2.y + paddle2.width / 2)
-
-            if not args.nogui:
-                paddle1.draw(screen)
-                paddle2.draw(screen)
-                ball.draw(screen)
-                score_text = font.render(str(score[0]) + " - " + str(score[1]), True, (255, 255, 255))
-                score_text_rect = score_text.get_rect()
-                score_text_rect.center = (args.width / 2, 32)
-                output_text = font.render('Paddle 1 output: ' + '{:.2f}'.format(paddle_speed_outputs[0]), True, (255, 255, 255))
-                output_text_rect = output_text.get_rect()
-                output_text_rect.center = (args.width / 2, 64)
-                output2_text = font.render('Paddle 2 output: ' + '{:.2f}'.format(paddle_speed_outputs[1]), True, (255, 255, 255))
-                output2_text_rect = output2_text.get_rect()
-                output2_text_rect.center = (args.width / 2, 96)
-                ball_input_text = font.render('Paddle 1 ball delta: ' + '{:.2f}'.format(ball_delta_y_input), True, (255, 255, 255))
-                ball_input_text_rect = ball_input_text.get_rect()
-                ball_input_text_rect.center = (args.width / 2, 128)
-                ball_input2_text = font.render('Paddle 2 ball delta: ' + '{:.2f}'.format(ball_delta_y_input_2), True, (255, 255, 255))
-                ball_input2_text_rect = ball_input2_text.get_rect()
-                ball_input2_text_rect.center = (args.width / 2, 160)
-                paddle_input_text = font.render('Paddle 1 velocity: ' + '{:.2f}'.format(paddle1.velocity), True,
-                                                (255, 255, 255))
-                paddle_input_text_rect = paddle_input_text.get_rect()
-                paddle_input_text_rect.center = (args.width / 2, 192)
-                paddle2_input_text = font.render('Paddle 2 velocity: ' + '{:.2f}'.format(paddle2.velocity), True,
-                                                 (255, 255, 255))
-                paddle2_input_text_rect = paddle2_input_text.get_rect()
-                paddle2_input_text_rect.center = (args.width / 2, 224)
-                screen.blit(score_text, score_text_rect)
-                screen.blit(output_text, output_text_rect)
-                screen.blit(output2_text, output2_text_rect)
-                screen.blit(ball_input_text, ball_input_text_rect)
-                screen.blit(ball_input2_text, ball_input2_text_rect)
-                screen.blit(paddle_input_text, paddle_input_text_rect)
-                screen.blit(paddle2_input_text, paddle2_input_text_rect)
-
-                pg.display.flip()
+                    accumulator += delta
+                    while accumulator >= args.timestep and not match.finished:
+                        match.step(args.timestep, speed, spin)
+                        accumulator -= args.timestep
+
+                if match.finished:
+                    break
+
+                paddle_speed_outputs = match.paddle_speed_outputs
+                ball_delta_y_input = match.ball_delta_y(paddle1)
+                ball_delta_y_input_2 = match.ball_delta_y(paddle2)
+
+                if profiler is not None:
+                    mark = profiler.now()
+                renderer.draw_objects([paddle1, paddle2, ball])
+                if profiler is not None:
+                    profiler.record('draw', profiler.now() - mark)
+                    mark = profiler.now()
+                renderer.draw_hud([str(score[0]) + " - " + str(score[1]),
+                                   'Paddle 1 output: ' + '{:.2f}'.format(paddle_speed_outputs[0]),
+                                   'Paddle 2 output: ' + '{:.2f}'.format(paddle_speed_outputs[1]),
+                                   'Paddle 1 ball delta: ' + '{:.2f}'.format(ball_delta_y_input),
+                                   'Paddle 2 ball delta: ' + '{:.2f}'.format(ball_delta_y_input_2),
+                                   'Paddle 1 velocity: ' + '{:.2f}'.format(paddle1.velocity),
+                                   'Paddle 2 velocity: ' + '{:.2f}'.format(paddle2.velocity)])
+                if profiler is not None:
+                    profiler.record('hud', profiler.now() - mark)
+                    mark = profiler.now()
+
+                renderer.update()
+                if profiler is not None:
+                    now = profiler.now()
+                    profiler.record('flip', now - mark)
+                    profiler.record('frame', now - frame_start)
+
+        if recording is not None:
+            recording.end_game(match)
+        if match.finished:
+            games_won[match.winner] += 1
+
+    if recording is not None:
+        recording.save(args.record)
+        log('Recording saved to ' + args.record)
+    if recorder is not None:
+        recorder.close()
+        log('Telemetry rows: ' + str(recorder.rows))
+    if profile is not None:
+        profile.disable()
+        profile.dump_stats(args.cprofile)
 
     log('Games won: ' + str(games_won))
+    if args.cache is not None and fuzzy_system is not None:
+        log('Fuzzy cache: ' + fuzzy_system.stats())
     log('Time elapsed: ' + str(datetime.now() - start_time))
+    if profiler is not None:
+        for line in profiler.summary_lines():
+            log(line)
+            if not args.nogui:
+                print(line)
+        if args.profile_output is not None:
+            profiler.write(args.profile_output)
 
 
 if __name__ == "__main__":
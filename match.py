@@ -0,0 +1,290 @@
+import argparse
+import math
+import random
+from typing import Callable, TYPE_CHECKING
+
+from ball import Ball
+from paddle import Paddle
+
+if TYPE_CHECKING:
+    from profiler import FrameProfiler
+    from telemetry import TelemetryRecorder
+
+DEFAULT_TIMESTEP = 1 / 240
+
+
+class Match:
+    def __init__(self, paddle1_system, paddle2_system, width: int = 1024, height: int = 768, speed: float = 1000.0,
+                 max_speed: float = 800.0, ball_speed: float = 800.0, max_angle_variation: float = 45.0,
+                 paddle_size: int = 100, score: int = -1, ball_reset: int | None = None, seed: int | None = None,
+                 log: Callable[[str], None] | None = None, log_scores: bool = True,
+                 profiler: 'FrameProfiler | None' = None, recorder: 'TelemetryRecorder | None' = None,
+                 control_rate: float | None = None):
+        self.paddle_systems = [paddle1_system, paddle2_system]
+        self.paddle_names = [system if isinstance(system, str) else getattr(system, 'name', type(system).__name__)
+                             for system in self.paddle_systems]
+        self.profiler = profiler
+        self.recorder = recorder
+        self.input_recorder = None
+        self._controller_phases = ['controller ' + name for name in self.paddle_names]
+        self.width = width
+        self.height = height
+        self.ball_speed = ball_speed
+        self.max_angle_variation = max_angle_variation
+        self.score_to_win = score
+        self.ball_reset = ball_reset
+        self.seed = seed
+        self.log = log
+        self.log_scores = log_scores
+        self.control_period = None if control_rate is None else 1.0 / control_rate
+
+        self.rng = random.Random(seed)
+        self.score = [0, 0]
+        self.paddle1 = Paddle(10, height // 2 - 50, paddle_size, speed, max_speed)
+        self.paddle2 = Paddle(width - 20, height // 2 - 50, paddle_size, speed, max_speed)
+        self.ball = Ball(width // 2, height // 2, 5, ball_speed / 2, self.rng)
+        self.paddle_speed_outputs = [0.0, 0.0]
+        self.controller_inputs = [[0.0, 0.0], [0.0, 0.0]]
+        self.time = 0.0
+        self.time_since_ball_spawn = 0.0
+        self.steps = 0
+        self.control_time = 0.0
+        self.rally = 0
+        self.paddle_contacts = [False, False]
+        self.rallies = []
+        self.finished = False
+        self.winner = None
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace, paddle1_system, paddle2_system, seed: int | None = None,
+                  log: Callable[[str], None] | None = None) -> 'Match':
+        return cls(paddle1_system, paddle2_system, args.width, args.height, args.speed, args.max_speed,
+                   args.ball_speed, args.max_angle_variation, args.paddle_size, args.score, args.ball_reset, seed,
+                   log, args.log is not None, control_rate=args.control_rate)
+
+    @property
+    def paddles(self) -> list[Paddle]:
+        return [self.paddle1, self.paddle2]
+
+    def _log(self, message: str):
+        if self.log is not None:
+            self.log(message)
+
+    def reset_ball(self):
+        self.ball.x = self.width / 2.0
+        self.ball.y = self.height / 2.0
+        self.ball.speed = self.ball_speed / 2
+        self.ball.angle = self.rng.randint(0, 360)
+        self.time_since_ball_spawn = 0.0
+
+    def _tick(self, delta: float, input_speed: int | float):
+        self.time += delta
+        self.steps += 1
+        self.time_since_ball_spawn += delta
+        if self.ball_reset is not None and self.time_since_ball_spawn >= self.ball_reset:
+            self._log('Ball reset after ' + str(self.time_since_ball_spawn) + ' seconds')
+            self.reset_ball()
+
+        # With a control rate, controllers are evaluated once per control period and their output is held between
+        control_due = self.control_period is None or self.control_time <= 0.0
+        if self.control_period is not None:
+            if control_due:
+                self.control_time = max(self.control_time + self.control_period, 0.0)
+            self.control_time -= delta
+
+        profiler = self.profiler
+        for i, (paddle_system, paddle) in enumerate(zip(self.paddle_systems, self.paddles)):
+            if paddle_system != 'input' and not control_due:
+                paddle.move(self.paddle_speed_outputs[i], delta)
+                continue
+            # (ballDeltaY, paddleVelocity) the current output is computed from, kept for telemetry
+            controller_inputs = self.controller_inputs[i]
+            controller_inputs[0] = self.ball_delta_y(paddle)
+            controller_inputs[1] = paddle.velocity
+            if paddle_system == 'input':
+                paddle.move(input_speed, delta)
+                self.paddle_speed_outputs[i] = input_speed
+                continue
+            if profiler is not None:
+                start = profiler.now()
+            if self.control_period is None:
+                self.paddle_speed_outputs[i] = paddle_system.move_paddle(paddle, self.ball, delta)
+            else:
+                self.paddle_speed_outputs[i] = paddle_system.get_output(controller_inputs[0], controller_inputs[1])
+                paddle.move(self.paddle_speed_outputs[i], delta)
+            if profiler is not None:
+                profiler.record(self._controller_phases[i], profiler.now() - start)
+
+    def _update_paddles(self, delta: float):
+        for paddle in self.paddles:
+            paddle.update(delta)
+            if paddle.y <= 0.0:
+                paddle.y = 0.0
+                paddle.velocity = 0.0
+            if paddle.y >= self.height - paddle.width:
+                paddle.y = self.height - paddle.width
+                paddle.velocity = 0.0
+
+    def _point(self, scorer: int):
+        self.score[scorer] += 1
+        self.rallies.append(self.rally)
+        self.rally = 0
+        if self.log_scores:
+            self._log('Paddle ' + str(scorer + 1) + ' scored: ' + str(self.score))
+        self.reset_ball()
+
+    def _bounce(self, paddle: Paddle, direction: float, new_contact: bool = True):
+        # Step physics reflects the ball on every step it spends inside the paddle, a hit is counted once per contact
+        if new_contact and math.cos(math.radians(self.ball.angle)) * direction < 0.0:
+            self.rally += 1
+        angle_variation = (self.ball.y - paddle.y) / (paddle.width / 2) - 1
+        self.ball.angle = 180.0 - self.ball.angle + direction * angle_variation * self.max_angle_variation
+        self.ball.speed = self.ball_speed
+
+    def _check_end(self):
+        if self.finished:
+            return
+        if self.score_to_win != -1 and (self.score[0] >= self.score_to_win or self.score[1] >= self.score_to_win):
+            if self.log_scores:
+                self._log('Game ended')
+                self._log(str(self.score))
+            self.finished = True
+            self.winner = 0 if self.score[0] > self.score[1] else 1
+
+    def step(self, delta: float, input_speed: int | float = 0, input_spin: int = 0) -> bool:
+        self._tick(delta, input_speed)
+        profiler = self.profiler
+        if profiler is not None:
+            start = profiler.now()
+        ball = self.ball
+        ball.angle += input_spin
+        self._update_paddles(delta)
+        ball.update(delta)
+
+        paddle1, paddle2 = self.paddle1, self.paddle2
+        if ball.y <= 0.0 or ball.y >= self.height:
+            ball.angle = 360.0 - ball.angle
+        if ball.x <= 0.0:
+            self._point(1)
+        if ball.x >= self.width:
+            self._point(0)
+        contacts = [paddle1.x <= ball.x <= paddle1.x + 10 and paddle1.y <= ball.y <= paddle1.y + paddle1.width,
+                    paddle2.x >= ball.x >= paddle2.x - 10 and paddle2.y <= ball.y <= paddle2.y + paddle2.width]
+        if contacts[0]:
+            self._bounce(paddle1, 1.0, not self.paddle_contacts[0])
+        if contacts[1]:
+            self._bounce(paddle2, -1.0, not self.paddle_contacts[1])
+        self.paddle_contacts = contacts
+
+        self._check_end()
+        if profiler is not None:
+            profiler.record('physics', profiler.now() - start)
+        if self.recorder is not None:
+            self.recorder.record(self)
+        if self.input_recorder is not None:
+            self.input_recorder.record(self, delta, input_speed, input_spin)
+        return not self.finished
+
+    def _next_event(self) -> tuple[float, str]:
+        ball = self.ball
+        velocity_x = ball.speed * math.cos(math.radians(ball.angle))
+        velocity_y = ball.speed * math.sin(math.radians(ball.angle))
+        events = []
+        if velocity_y < 0.0:
+            events.append((-ball.y / velocity_y, 'top'))
+        if velocity_y > 0.0:
+            events.append(((self.height - ball.y) / velocity_y, 'bottom'))
+        if velocity_x < 0.0:
+            plane = self.paddle1.x + 10
+            if ball.x > plane:
+                events.append(((plane - ball.x) / velocity_x, 'paddle1'))
+            events.append((-ball.x / velocity_x, 'left'))
+        if velocity_x > 0.0:
+            plane = self.paddle2.x - 10
+            if ball.x < plane:
+                events.append(((plane - ball.x) / velocity_x, 'paddle2'))
+            events.append(((self.width - ball.x) / velocity_x, 'right'))
+        return min(events)
+
+    def advance(self, delta: float) -> bool:
+        self._tick(delta, 0)
+        profiler = self.profiler
+        if profiler is not None:
+            start = profiler.now()
+        self._update_paddles(delta)
+
+        # Move the ball straight to each wall, paddle plane or goal line it reaches within this control period
+        ball = self.ball
+        remaining = delta
+        while remaining > 0.0:
+            time_to_event, event = self._next_event()
+            if time_to_event > remaining:
+                ball.update(remaining)
+                break
+            ball.update(time_to_event)
+            remaining -= time_to_event
+            if event == 'top' or event == 'bottom':
+                ball.y = 0.0 if event == 'top' else float(self.height)
+                ball.angle = 360.0 - ball.angle
+            elif event == 'paddle1' or event == 'paddle2':
+                # A steep return can leave the ball still heading for this paddle's goal. Step physics would
+                # reflect it again while it stays inside the paddle box; here it passes behind the paddle
+                paddle = self.paddle1 if event == 'paddle1' else self.paddle2
+                ball.x = paddle.x + 10 if event == 'paddle1' else paddle.x - 10
+                if paddle.y <= ball.y <= paddle.y + paddle.width:
+                    self._bounce(paddle, 1.0 if event == 'paddle1' else -1.0)
+            else:
+                self._point(1 if event == 'left' else 0)
+                self._check_end()
+                if self.finished:
+                    break
+
+        self._check_end()
+        if profiler is not None:
+            profiler.record('physics', profiler.now() - start)
+        if self.recorder is not None:
+            self.recorder.record(self)
+        if self.input_recorder is not None:
+            self.input_recorder.record(self, delta, 0, 0)
+        return not self.finished
+
+    def ball_delta_y(self, paddle: Paddle) -> float:
+        return self.ball.y - (paddle.y + paddle.width / 2)
+
+    def state(self) -> dict:
+        ball = self.ball
+        return {'steps': self.steps, 'time': self.time, 'time_since_ball_spawn': self.time_since_ball_spawn,
+                'control_time': self.control_time,
+                'score': list(self.score), 'ball': [ball.x, ball.y, ball.angle, ball.speed],
+                'paddles': [[paddle.y, paddle.velocity] for paddle in self.paddles],
+                'paddle_speed_outputs': list(self.paddle_speed_outputs),
+                'controller_inputs': [list(inputs) for inputs in self.controller_inputs], 'rally': self.rally,
+                'paddle_contacts': list(self.paddle_contacts),
+                'rallies': list(self.rallies), 'finished': self.finished, 'winner': self.winner,
+                'rng': self.rng.getstate()}
+
+    def restore(self, state: dict):
+        self.steps = state['steps']
+        self.time = state['time']
+        self.time_since_ball_spawn = state['time_since_ball_spawn']
+        self.control_time = state['control_time']
+        self.score[:] = state['score']
+        self.ball.x, self.ball.y, self.ball.angle, self.ball.speed = state['ball']
+        for paddle, (y, velocity) in zip(self.paddles, state['paddles']):
+            paddle.y = y
+            paddle.velocity = velocity
+        self.paddle_speed_outputs[:] = state['paddle_speed_outputs']
+        self.controller_inputs = [list(inputs) for inputs in state['controller_inputs']]
+        self.rally = state['rally']
+        self.paddle_contacts = list(state['paddle_contacts'])
+        self.rallies = list(state['rallies'])
+        self.finished = state['finished']
+        self.winner = state['winner']
+        version, internal_state, gauss_next = state['rng']
+        self.rng.setstate((version, tuple(internal_state), gauss_next))
+
+    def run(self, timestep: float = DEFAULT_TIMESTEP, max_time: float | None = None, events: bool = False) -> list[int]:
+        step = self.advance if events else self.step
+        while not self.finished and (max_time is None or self.time < max_time):
+            step(timestep)
+        return self.score
@@ -1,4 +1,7 @@
-import pygame as pg
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pygame as pg
 
 
 class Paddle:
@@ -16,5 +19,7 @@ class Paddle:
 
     def update(self, delta_time: float):
         self.y += self.velocity * delta_time
-    def draw(self, screen: pg.Surface):
-        pg.draw.rect(screen, (255, 255, 255), (self.x, self.y, 10, self.width))
+    def draw(self, screen: 'pg.Surface') -> 'pg.Rect':
+        import pygame as pg
+
+        return pg.draw.rect(screen, (255, 255, 255), (self.x, self.y, 10, self.width))
@@ -0,0 +1,54 @@
+import argparse
+import sys
+
+import numpy as np
+
+from fuzzy_system import FuzzySystem
+
+# (screen_height, paddle_size, max_speed, ball_speed)
+PARAMETER_SETS = [(768, 100, 800.0, 800.0), (600, 80, 600.0, 500.0), (1080, 150, 1200.0, 1000.0)]
+
+
+def check_parity(params: tuple[int, int, float, float], samples: int, seed: int) -> tuple[float, float, float]:
+    screen_height, paddle_size, max_speed, ball_speed = params
+    system = FuzzySystem(screen_height, paddle_size, max_speed, ball_speed)
+    membership_error = 0.0
+    # Native membership arrays against scikit-fuzzy's trapmf and trimf on the same shapes
+    for variable in ['ball_delta_y', 'paddle_velocity', 'paddle_speed']:
+        terms = getattr(system, variable + '_terms')
+        reference = system.membership(getattr(system, variable + '_universe'), getattr(system, variable + '_shapes'),
+                                      system.skfuzzy_mfs())
+        for label, mf in reference.items():
+            membership_error = max(membership_error, float(np.abs(terms[label] - mf).max()))
+    rng = np.random.default_rng(seed)
+    # Inputs reach past the universes so clipping at the edges is compared too
+    ball_delta_y = rng.uniform(-1.1 * screen_height, 1.1 * screen_height, samples)
+    paddle_velocity = rng.uniform(-1.1 * max_speed, 1.1 * max_speed, samples)
+    exact = system.compute_exact(ball_delta_y, paddle_velocity)
+    scalar = np.array([system.get_output(x, v) for x, v in zip(ball_delta_y.tolist(), paddle_velocity.tolist())])
+    batch = system.get_outputs(ball_delta_y, paddle_velocity)
+    return membership_error, float(np.abs(scalar - exact).max()), float(np.abs(batch - exact).max())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--samples', type=int, default=1000, help='Seeded input states per parameter set')
+    parser.add_argument('--seed', type=int, default=0, help='Input seed')
+    parser.add_argument('--tolerance', type=float, default=1e-9,
+                        help='Max absolute difference from scikit-fuzzy before exiting with status 1')
+    args = parser.parse_args()
+
+    failed = False
+    for params in PARAMETER_SETS:
+        membership_error, scalar_error, batch_error = check_parity(params, args.samples, args.seed)
+        passed = max(membership_error, scalar_error, batch_error) <= args.tolerance
+        failed = failed or not passed
+        print(str(params) + ': membership max error ' + '{:.3g}'.format(membership_error)
+              + ', get_output max error ' + '{:.3g}'.format(scalar_error)
+              + ', get_outputs max error ' + '{:.3g}'.format(batch_error) + (' ok' if passed else ' FAILED'))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import json
+import math
+import time
+
+MIN_NS = 100
+BUCKETS_PER_DECADE = 20
+DECADES = 9
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.buckets = [0] * (BUCKETS_PER_DECADE * DECADES + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns: int):
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+        index = int(math.log10(ns / MIN_NS) * BUCKETS_PER_DECADE) + 1 if ns > MIN_NS else 0
+        self.buckets[min(index, len(self.buckets) - 1)] += 1
+
+    def percentile(self, percent: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = percent / 100 * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank:
+                # Upper edge of the bucket, never above the largest sample
+                return min(MIN_NS * 10 ** (index / BUCKETS_PER_DECADE), self.max)
+        return float(self.max)
+
+    def summary(self) -> dict:
+        return {'count': self.count, 'mean_ns': self.total / self.count if self.count else 0.0,
+                'p50_ns': self.percentile(50), 'p95_ns': self.percentile(95), 'p99_ns': self.percentile(99),
+                'max_ns': self.max}
+
+
+class FrameProfiler:
+    now = staticmethod(time.perf_counter_ns)
+
+    def __init__(self):
+        self.phases = {}
+
+    def record(self, phase: str, ns: int):
+        histogram = self.phases.get(phase)
+        if histogram is None:
+            histogram = self.phases[phase] = LatencyHistogram()
+        histogram.record(ns)
+
+    def summary(self) -> dict:
+        return {phase: histogram.summary() for phase, histogram in self.phases.items()}
+
+    def summary_lines(self) -> list[str]:
+        def us(ns: float) -> str:
+            return '{:.1f}'.format(ns / 1000)
+
+        lines = ['Profile (us): phase, count, mean, p50, p95, p99, max']
+        for phase, summary in self.summary().items():
+            lines.append(phase + ': ' + str(summary['count']) + ', ' + us(summary['mean_ns']) + ', '
+                         + us(summary['p50_ns']) + ', ' + us(summary['p95_ns']) + ', ' + us(summary['p99_ns'])
+                         + ', ' + us(summary['max_ns']))
+        return lines
+
+    def write(self, path: str):
+        with open(path, 'w') as profile_file:
+            json.dump(self.summary(), profile_file, indent=2)
@@ -0,0 +1,81 @@
+import pygame as pg
+
+BACKGROUND = (0, 0, 0)
+FOREGROUND = (255, 255, 255)
+HUD_LINE_HEIGHT = 32
+
+
+class Renderer:
+    def __init__(self, screen: pg.Surface, font: pg.font.Font, max_cached_texts: int = 4096):
+        self.screen = screen
+        self.font = font
+        self.max_cached_texts = max_cached_texts
+        self.texts = {}
+        self.objects = []
+        self.object_rects = []
+        self.hud = []
+        self.dirty = []
+        self.full = True
+
+    def text(self, message: str) -> pg.Surface:
+        surface = self.texts.get(message)
+        if surface is None:
+            if len(self.texts) >= self.max_cached_texts:
+                self.texts.clear()
+            surface = self.texts[message] = self.font.render(message, True, FOREGROUND)
+        return surface
+
+    def draw_objects(self, objects: list):
+        screen = self.screen
+        if self.full:
+            screen.fill(BACKGROUND)
+        else:
+            for rect in self.object_rects:
+                screen.fill(BACKGROUND, rect)
+        rects = [drawable.draw(screen) for drawable in objects]
+        self.dirty.extend(self.object_rects)
+        self.dirty.extend(rects)
+        self.objects = objects
+        self.object_rects = rects
+
+    def draw_hud(self, lines: list[str]):
+        screen = self.screen
+        center_x = screen.get_width() / 2
+        surfaces = [self.text(message) for message in lines]
+        rects = [surface.get_rect(center=(center_x, HUD_LINE_HEIGHT * (n + 1))) for n, surface in enumerate(surfaces)]
+        if self.full:
+            for surface, rect in zip(surfaces, rects):
+                screen.blit(surface, rect)
+            self.hud = list(zip(lines, rects))
+            return
+
+        areas = []
+        for n, (message, rect) in enumerate(zip(lines, rects)):
+            previous, previous_rect = self.hud[n] if n < len(self.hud) else (None, None)
+            if previous_rect is None:
+                areas.append(rect)
+            elif message != previous:
+                areas.append(rect.union(previous_rect))
+            elif previous_rect.collidelist(self.dirty) != -1:
+                # Unchanged lines are only redrawn where moving objects erased or covered them
+                areas.append(rect)
+        for area in areas:
+            screen.fill(BACKGROUND, area)
+            screen.set_clip(area)
+            for drawable, object_rect in zip(self.objects, self.object_rects):
+                if object_rect.colliderect(area):
+                    drawable.draw(screen)
+            for surface, rect in zip(surfaces, rects):
+                if rect.colliderect(area):
+                    screen.blit(surface, rect)
+            screen.set_clip(None)
+        self.dirty.extend(areas)
+        self.hud = list(zip(lines, rects))
+
+    def update(self):
+        if self.full:
+            pg.display.flip()
+            self.full = False
+        else:
+            pg.display.update(self.dirty)
+        self.dirty = []
@@ -0,0 +1,82 @@
+import argparse
+import json
+
+import numpy as np
+
+from match import Match
+
+
+class MatchRecorder:
+    def __init__(self, args: argparse.Namespace, snapshot_interval: int = 1000):
+        self.config = dict(vars(args))
+        self.snapshot_interval = snapshot_interval
+        self.games = []
+
+    def start_game(self, match: Match, events: bool = False):
+        self.games.append({'seed': match.seed, 'events': events, 'score': None, 'snapshots': [match.state()],
+                           'deltas': [], 'input_speeds': [], 'input_spins': []})
+        match.input_recorder = self
+
+    def record(self, match: Match, delta: float, input_speed: int | float, input_spin: int):
+        game = self.games[-1]
+        game['deltas'].append(delta)
+        game['input_speeds'].append(input_speed)
+        game['input_spins'].append(input_spin)
+        if match.steps % self.snapshot_interval == 0:
+            game['snapshots'].append(match.state())
+
+    def end_game(self, match: Match):
+        self.games[-1]['score'] = list(match.score)
+        match.input_recorder = None
+
+    def save(self, path: str):
+        meta = {'config': self.config, 'snapshot_interval': self.snapshot_interval, 'games': []}
+        arrays = {}
+        for n, game in enumerate(self.games):
+            arrays['deltas_' + str(n)] = np.array(game['deltas'], dtype=np.float64)
+            arrays['input_speeds_' + str(n)] = np.array(game['input_speeds'], dtype=np.float64)
+            arrays['input_spins_' + str(n)] = np.array(game['input_spins'], dtype=np.int8)
+            meta['games'].append({key: game[key] for key in ['seed', 'events', 'score', 'snapshots']})
+        np.savez_compressed(path, meta=np.array(json.dumps(meta)), **arrays)
+
+
+class Replay:
+    def __init__(self, path: str):
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            self.games = meta['games']
+            for n, game in enumerate(self.games):
+                game['deltas'] = data['deltas_' + str(n)].tolist()
+                game['input_speeds'] = data['input_speeds_' + str(n)].tolist()
+                game['input_spins'] = data['input_spins_' + str(n)].tolist()
+        self.args = argparse.Namespace(**meta['config'])
+        self.snapshot_interval = meta['snapshot_interval']
+
+    def length(self, game: int) -> int:
+        return len(self.games[game]['deltas'])
+
+    def step(self, game: int, match: Match) -> bool:
+        record = self.games[game]
+        i = match.steps
+        if i >= len(record['deltas']):
+            return False
+        if record['events']:
+            match.advance(record['deltas'][i])
+        else:
+            match.step(record['deltas'][i], record['input_speeds'][i], record['input_spins'][i])
+        return True
+
+    def seek(self, game: int, match: Match, step: int):
+        step = max(step, 0)
+        snapshot = None
+        for state in self.games[game]['snapshots']:
+            if state['steps'] <= step:
+                snapshot = state
+        match.restore(snapshot)
+        while match.steps < step and self.step(game, match):
+            pass
+
+    def play(self, game: int, match: Match) -> bool:
+        while self.step(game, match):
+            pass
+        return match.score == self.games[game]['score']
@@ -0,0 +1,91 @@
+import json
+import os
+
+import numpy as np
+
+COLUMNS = [('game', np.int32), ('step', np.int32), ('time', np.float64),
+           ('ball_x', np.float32), ('ball_y', np.float32), ('ball_angle', np.float32), ('ball_speed', np.float32),
+           ('paddle1_y', np.float32), ('paddle1_velocity', np.float32),
+           ('paddle2_y', np.float32), ('paddle2_velocity', np.float32),
+           ('paddle1_ball_delta_y', np.float32), ('paddle1_velocity_input', np.float32),
+           ('paddle2_ball_delta_y', np.float32), ('paddle2_velocity_input', np.float32),
+           ('paddle1_output', np.float32), ('paddle2_output', np.float32),
+           ('score1', np.int32), ('score2', np.int32)]
+
+
+class TelemetryRecorder:
+    def __init__(self, path: str, chunk_size: int = 65536):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.game = 0
+        self.rows = 0
+        self.size = 0
+        self.buffers = {name: np.empty(chunk_size, dtype=dtype) for name, dtype in COLUMNS}
+        os.makedirs(path, exist_ok=True)
+        for name, _ in COLUMNS:
+            open(self._column_path(name), 'wb').close()
+        self._write_meta()
+
+    def _column_path(self, name: str) -> str:
+        return os.path.join(self.path, name + '.bin')
+
+    def _write_meta(self):
+        with open(os.path.join(self.path, 'meta.json'), 'w') as meta_file:
+            json.dump({'rows': self.rows, 'columns': [[name, np.dtype(dtype).str] for name, dtype in COLUMNS]},
+                      meta_file)
+
+    def record(self, match):
+        i = self.size
+        buffers = self.buffers
+        ball = match.ball
+        paddle1, paddle2 = match.paddle1, match.paddle2
+        buffers['game'][i] = self.game
+        buffers['step'][i] = match.steps
+        buffers['time'][i] = match.time
+        buffers['ball_x'][i] = ball.x
+        buffers['ball_y'][i] = ball.y
+        buffers['ball_angle'][i] = ball.angle
+        buffers['ball_speed'][i] = ball.speed
+        buffers['paddle1_y'][i] = paddle1.y
+        buffers['paddle1_velocity'][i] = paddle1.velocity
+        buffers['paddle2_y'][i] = paddle2.y
+        buffers['paddle2_velocity'][i] = paddle2.velocity
+        # Controller inputs as captured before the step, paired with the outputs computed from them
+        inputs1, inputs2 = match.controller_inputs
+        buffers['paddle1_ball_delta_y'][i] = inputs1[0]
+        buffers['paddle1_velocity_input'][i] = inputs1[1]
+        buffers['paddle2_ball_delta_y'][i] = inputs2[0]
+        buffers['paddle2_velocity_input'][i] = inputs2[1]
+        buffers['paddle1_output'][i] = match.paddle_speed_outputs[0]
+        buffers['paddle2_output'][i] = match.paddle_speed_outputs[1]
+        buffers['score1'][i] = match.score[0]
+        buffers['score2'][i] = match.score[1]
+        self.size += 1
+        if self.size == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.size == 0:
+            return
+        for name, _ in COLUMNS:
+            with open(self._column_path(name), 'ab') as column_file:
+                self.buffers[name][:self.size].tofile(column_file)
+        self.rows += self.size
+        self.size = 0
+        self._write_meta()
+
+    def close(self):
+        self.flush()
+
+
+def load_telemetry(path: str) -> dict[str, np.ndarray]:
+    with open(os.path.join(path, 'meta.json')) as meta_file:
+        meta = json.load(meta_file)
+    rows = meta['rows']
+    columns = {}
+    for name, dtype in meta['columns']:
+        if rows == 0:
+            columns[name] = np.empty(0, dtype=dtype)
+        else:
+            columns[name] = np.memmap(os.path.join(path, name + '.bin'), dtype=dtype, mode='r', shape=(rows,))
+    return columns
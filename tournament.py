@@ -0,0 +1,134 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+from collections import Counter
+from typing import Callable
+
+import crisp_system
+from controller_cache import CachedController
+from fuzzy_system import FuzzySystem
+from match import Match, DEFAULT_TIMESTEP
+
+SYSTEMS = ['crisp', 'fuzzy']
+
+_args = None
+_systems = {}
+
+
+def make_system(name: str, args: argparse.Namespace):
+    if name == 'crisp':
+        return crisp_system
+    if name == 'fuzzy':
+        config = FuzzySystem.load_config(args.fuzzy_config) if args.fuzzy_config is not None else None
+        system = FuzzySystem(args.height, args.paddle_size, args.max_speed, args.ball_speed, False, args.compiled,
+                             args.table, args.table_steps, config)
+        if args.cache is not None:
+            system = CachedController(system, tuple(args.cache_resolution), args.cache)
+        return system
+    raise ValueError('Unknown paddle system for tournament: ' + name)
+
+
+def _init_worker(args: argparse.Namespace):
+    global _args
+    _args = args
+    _systems.clear()
+
+
+def _get_system(name: str):
+    if name not in _systems:
+        _systems[name] = make_system(name, _args)
+    return _systems[name]
+
+
+def play_game(game: tuple[str, str, int]) -> dict:
+    paddle1, paddle2, seed = game
+    # Worker caches outlive games, so each game reports the counter increase of the caches it used
+    caches = [system for system in {_get_system(paddle1), _get_system(paddle2)} if isinstance(system, CachedController)]
+    before = [cache.counters() for cache in caches]
+    match = Match.from_args(_args, _get_system(paddle1), _get_system(paddle2), seed)
+    match.log_scores = False
+    match.run(_args.timestep or DEFAULT_TIMESTEP, _args.max_time, _args.physics == 'event')
+    cache_counters = Counter()
+    for cache, counters in zip(caches, before):
+        cache_counters.update({key: value - counters[key] for key, value in cache.counters().items()})
+    return {'paddle1': paddle1, 'paddle2': paddle2, 'seed': seed, 'score': list(match.score),
+            'winner': match.winner, 'rallies': match.rallies, 'time': match.time, 'cache': dict(cache_counters)}
+
+
+def pairings(systems: list[str]) -> list[tuple[str, str]]:
+    return list(itertools.permutations(systems, 2)) if len(systems) > 1 else [(systems[0], systems[0])]
+
+
+def merge_results(results: list[dict]) -> dict:
+    report = {'pairings': {}, 'systems': {}}
+    cache = Counter()
+    for result in sorted(results, key=lambda r: r['seed']):
+        cache.update(result['cache'])
+        key = result['paddle1'] + ' vs ' + result['paddle2']
+        pairing = report['pairings'].setdefault(key, {'games': 0, 'wins': [0, 0], 'unfinished': 0,
+                                                      'scores': Counter(), 'rallies': Counter()})
+        pairing['games'] += 1
+        pairing['scores'][str(result['score'][0]) + '-' + str(result['score'][1])] += 1
+        pairing['rallies'].update(result['rallies'])
+        if result['winner'] is None:
+            pairing['unfinished'] += 1
+            continue
+        pairing['wins'][result['winner']] += 1
+
+        winner = result['paddle1'] if result['winner'] == 0 else result['paddle2']
+        loser = result['paddle2'] if result['winner'] == 0 else result['paddle1']
+        report['systems'].setdefault(winner, {'wins': 0, 'losses': 0})['wins'] += 1
+        report['systems'].setdefault(loser, {'wins': 0, 'losses': 0})['losses'] += 1
+
+    for pairing in report['pairings'].values():
+        rallies = pairing['rallies']
+        points = sum(rallies.values())
+        pairing['rally_mean'] = sum(length * count for length, count in rallies.items()) / points if points else 0.0
+        pairing['rally_max'] = max(rallies) if rallies else 0
+        pairing['scores'] = dict(pairing['scores'].most_common())
+        pairing['rallies'] = {str(length): count for length, count in sorted(rallies.items())}
+    if cache:
+        report['cache'] = {key: cache[key] for key in ['hits', 'misses', 'evictions']}
+    return report
+
+
+def run_tournament(args: argparse.Namespace, systems: list[str], log: Callable[[str], None]) -> dict:
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    games = [(paddle1, paddle2, seed + n) for n, (paddle1, paddle2) in enumerate(pairings(systems) * args.games)]
+    workers = args.workers or os.cpu_count() or 1
+    log('Tournament: ' + ', '.join(systems) + ', ' + str(len(games)) + ' games on ' + str(workers)
+        + ' workers, seed ' + str(seed))
+
+    start = time.perf_counter()
+    if workers == 1:
+        _init_worker(args)
+        results = [play_game(game) for game in games]
+    else:
+        with multiprocessing.Pool(workers, _init_worker, (args,)) as pool:
+            chunk_size = max(1, len(games) // (workers * 4))
+            results = list(pool.imap_unordered(play_game, games, chunk_size))
+    elapsed = time.perf_counter() - start
+
+    report = merge_results(results)
+    report.update({'seed': seed, 'games': len(games), 'workers': workers, 'elapsed': elapsed})
+    for key, pairing in report['pairings'].items():
+        log(key + ': wins ' + str(pairing['wins']) + ', unfinished ' + str(pairing['unfinished'])
+            + ', mean rally ' + '{:.2f}'.format(pairing['rally_mean']) + ', max rally ' + str(pairing['rally_max']))
+    for name, system in sorted(report['systems'].items()):
+        log(name + ': ' + str(system['wins']) + ' wins, ' + str(system['losses']) + ' losses')
+    if 'cache' in report:
+        cache = report['cache']
+        lookups = cache['hits'] + cache['misses']
+        hit_rate = cache['hits'] / lookups * 100 if lookups else 0.0
+        log('Fuzzy cache: hits ' + str(cache['hits']) + ', misses ' + str(cache['misses']) + ', evictions '
+            + str(cache['evictions']) + ', hit rate ' + '{:.1f}'.format(hit_rate) + '%')
+    log('Tournament time: ' + '{:.2f}'.format(elapsed) + ' s')
+
+    if args.report is not None:
+        with open(args.report, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+    return report
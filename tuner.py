@@ -0,0 +1,164 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import time
+from typing import Callable
+
+import crisp_system
+from batch_match import BatchMatch
+from fuzzy_system import FuzzySystem, PADDLE_SPEED_TERMS
+from match import DEFAULT_TIMESTEP
+
+EVALUATION_SETTINGS = ['width', 'height', 'speed', 'max_speed', 'ball_speed', 'max_angle_variation', 'paddle_size',
+                       'games', 'max_time', 'timestep', 'control_rate', 'seed']
+
+_args = None
+
+
+def config_key(config: dict, args: argparse.Namespace) -> str:
+    settings = {key: getattr(args, key) for key in EVALUATION_SETTINGS}
+    return hashlib.sha1(json.dumps([config, settings], sort_keys=True).encode()).hexdigest()
+
+
+def _init_worker(args: argparse.Namespace):
+    global _args
+    _args = args
+
+
+def evaluate(config: dict) -> float:
+    args = _args
+    system = FuzzySystem(args.height, args.paddle_size, args.max_speed, args.ball_speed, config=config)
+    difference = 0
+    # Every candidate plays the same seeded serves on both sides, so fitness is deterministic and cacheable
+    for side, paddles in enumerate([(system, crisp_system), (crisp_system, system)]):
+        match = BatchMatch.from_args(args, args.games, paddles[0], paddles[1], args.seed + side)
+        match.run(args.timestep, args.max_time)
+        difference += int(match.score[:, side].sum()) - int(match.score[:, 1 - side].sum())
+    return difference / (2 * args.games)
+
+
+def _repair(values: list[float], limit: float, gap: float) -> list[float]:
+    # Keeps the far/fast breakpoint outside the close/slow one on each side of zero
+    negative = sorted(round(min(max(value, -limit), -gap), 1) for value in values[:2])
+    positive = sorted(round(min(max(value, gap), limit), 1) for value in values[2:])
+    return negative + positive
+
+
+def mutate(config: dict, rng: random.Random, args: argparse.Namespace) -> dict:
+    ball_delta_y = [value + rng.gauss(0.0, args.sigma * args.paddle_size) for value in config['ball_delta_y']]
+    paddle_velocity = [value + rng.gauss(0.0, args.sigma * args.ball_speed) for value in config['paddle_velocity']]
+    rules = list(config['rules'])
+    for n, term in enumerate(rules):
+        if rng.random() < args.rule_rate:
+            index = PADDLE_SPEED_TERMS.index(term) + rng.choice([-1, 1])
+            rules[n] = PADDLE_SPEED_TERMS[min(max(index, 0), len(PADDLE_SPEED_TERMS) - 1)]
+    return {'ball_delta_y': _repair(ball_delta_y, args.height, 0.5),
+            'paddle_velocity': _repair(paddle_velocity, args.max_speed, 0.1), 'rules': rules}
+
+
+def load_fitness_cache(path: str | None) -> dict[str, float]:
+    if path is None or not os.path.exists(path):
+        return {}
+    with open(path) as cache_file:
+        return json.load(cache_file)
+
+
+def save_fitness_cache(path: str | None, cache: dict[str, float]):
+    if path is None:
+        return
+    with open(path, 'w') as cache_file:
+        json.dump(cache, cache_file)
+
+
+def tune(args: argparse.Namespace, log: Callable[[str], None]) -> tuple[dict, float]:
+    rng = random.Random(args.seed)
+    cache = load_fitness_cache(args.fitness_cache)
+    workers = args.workers or os.cpu_count() or 1
+    default = FuzzySystem.default_config(args.paddle_size, args.ball_speed)
+    if args.initial is not None:
+        default = FuzzySystem.load_config(args.initial)
+    log('Tuning on ' + str(workers) + ' workers, ' + str(len(cache)) + ' cached fitness results')
+
+    pool = None
+    if workers > 1:
+        pool = multiprocessing.Pool(workers, _init_worker, (args,))
+    else:
+        _init_worker(args)
+
+    def evaluate_all(configs: list[dict]) -> list[float]:
+        keys = [config_key(config, args) for config in configs]
+        pending = {key: config for key, config in zip(keys, configs) if key not in cache}
+        if pool is not None:
+            results = pool.map(evaluate, list(pending.values()), 1)
+        else:
+            results = [evaluate(config) for config in pending.values()]
+        cache.update(zip(pending, results))
+        return [cache[key] for key in keys]
+
+    try:
+        start = time.perf_counter()
+        log('Initial config fitness: ' + '{:.3f}'.format(evaluate_all([default])[0]))
+        population = [default] + [mutate(default, rng, args) for _ in range(args.population - 1)]
+        ranked = sorted(zip(evaluate_all(population), population), key=lambda item: item[0], reverse=True)
+        for generation in range(args.generations):
+            parents = [config for _, config in ranked[:args.parents]]
+            children = [mutate(rng.choice(parents), rng, args) for _ in range(args.children)]
+            ranked = ranked + list(zip(evaluate_all(children), children))
+            ranked = sorted(ranked, key=lambda item: item[0], reverse=True)[:args.population]
+            log('Generation ' + str(generation + 1) + ': best ' + '{:.3f}'.format(ranked[0][0]) + ', mean '
+                + '{:.3f}'.format(sum(fitness for fitness, _ in ranked) / len(ranked)) + ', cached '
+                + str(len(cache)) + ', ' + '{:.1f}'.format(time.perf_counter() - start) + ' s')
+            # Saved every generation so an interrupted run keeps its progress
+            save_fitness_cache(args.fitness_cache, cache)
+            FuzzySystem.save_config(args.output, ranked[0][1], fitness=ranked[0][0], generation=generation + 1)
+        save_fitness_cache(args.fitness_cache, cache)
+        FuzzySystem.save_config(args.output, ranked[0][1], fitness=ranked[0][0], generation=args.generations)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return ranked[0][1], ranked[0][0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output', type=str, default='fuzzy_config.json',
+                        help='Best fuzzy config file, load it with main.py --fuzzy_config')
+    parser.add_argument('--initial', type=str, default=None, help='Fuzzy config file to start from (default rules)')
+    parser.add_argument('--fitness_cache', type=str, default='fitness_cache.json',
+                        help='JSON file of fitness results keyed by config and evaluation settings hash')
+    parser.add_argument('--generations', type=int, default=20, help='Number of generations')
+    parser.add_argument('--population', type=int, default=16, help='Configs kept between generations')
+    parser.add_argument('--parents', type=int, default=4, help='Best configs mutated into children')
+    parser.add_argument('--children', type=int, default=16, help='New configs per generation')
+    parser.add_argument('--sigma', type=float, default=0.1,
+                        help='Breakpoint mutation std dev, relative to paddle size and ball speed')
+    parser.add_argument('--rule_rate', type=float, default=0.05,
+                        help='Chance of moving each rule output to a neighbouring paddleSpeed term')
+    parser.add_argument('--games', type=int, default=16, help='Matches per side against crisp for each fitness')
+    parser.add_argument('--max_time', type=float, default=30.0, help='Simulated time per fitness match (s)')
+    parser.add_argument('--timestep', type=float, default=DEFAULT_TIMESTEP, help='Simulation timestep (s)')
+    parser.add_argument('--control_rate', type=float, default=60.0,
+                        help='Paddle system evaluation rate (Hz) in fitness matches')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for mutations and fitness match serves')
+    parser.add_argument('--workers', type=int, default=None, help='Fitness worker processes (all cores by default)')
+    parser.add_argument('--width', type=int, default=1024, help='Window width (px)')
+    parser.add_argument('--height', type=int, default=768, help='Window height (px)')
+    parser.add_argument('--speed', type=float, default=1000.0, help='Paddle speed (px/s)')
+    parser.add_argument('--max_speed', type=float, default=800.0, help='Paddle max speed (px/s)')
+    parser.add_argument('--ball_speed', type=float, default=800.0, help='Ball speed (px/s)')
+    parser.add_argument('--max_angle_variation', type=float, default=45.0, help='Max angle variation (deg)')
+    parser.add_argument('--paddle_size', type=int, default=100, help='Paddle size (px)')
+    args = parser.parse_args()
+    args.score = -1
+    args.ball_reset = None
+
+    best, fitness = tune(args, print)
+    print('Best fitness: ' + '{:.3f}'.format(fitness) + ', saved to ' + args.output)
+
+
+if __name__ == "__main__":
+    main()